@@ -0,0 +1,207 @@
+"""
+Benchmarks for the graph engine, run against a synthetic corpus.
+
+Usage:
+    python bench.py [curation] [--scenes N] [--ops N] [--seed N]
+    python bench.py stress [--scenes N] [--ops N] [--threads N] [--seed N]
+
+Builds a Corpus -> Volume -> Scene -> Shot -> Paragraph -> Sentence graph
+(with Sentence -> Term lexicon edges, so the edge count is realistic).
+
+curation: replays a stream of random merge/split/rename curation operations.
+stress:   concurrency stress test of the API state; writer threads apply
+          operations while reader threads serialize the graph and check that
+          they never observe a half-applied change. Exits non-zero if any
+          reader saw an inconsistent hierarchy.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+root = Path(__file__).parent
+sys.path.insert(0, str(root))
+
+from engine.graph.model import Graph
+from engine.curate import operations
+
+
+def build_synthetic_graph(scenes=2000, shots=4, paragraphs=4, sentences=3,
+                          words=8, vocabulary=5000, seed=0):
+    rng = random.Random(seed)
+    g = Graph()
+    corpus = g.create_node(['Corpus'], {'name': 'synthetic'})
+    volume = g.create_node(['Volume'], {'title': 'Synthetic'})
+    g.create_edge('CONTAINS', corpus.id, volume.id)
+    terms = [g.create_node(['Term'], {'text': f"t{i}"}) for i in range(vocabulary)]
+
+    def add_children(parent, label, count, props):
+        prev = None
+        children = []
+        for i in range(1, count + 1):
+            child = g.create_node([label], dict(props(i), index=i))
+            g.create_edge('CONTAINS', parent.id, child.id, {'index': i})
+            if prev:
+                g.create_edge('PRECEDES', prev.id, child.id)
+            prev = child
+            children.append(child)
+        return children
+
+    for scene in add_children(volume, 'Scene', scenes, lambda i: {'heading': f"SCENE {i}"}):
+        for shot in add_children(scene, 'Shot', shots, lambda i: {'heading': f"SHOT {i}"}):
+            for para in add_children(shot, 'Paragraph', paragraphs,
+                                     lambda i: {'type': 'action', 'text': ''}):
+                for sent in add_children(para, 'Sentence', sentences,
+                                         lambda i: {'text': ''}):
+                    for pos in range(1, words + 1):
+                        term = terms[rng.randrange(vocabulary)]
+                        g.create_edge('CONTAINS', sent.id, term.id,
+                                      {'position': pos, 'pos': 'NN', 'raw': term.properties['text']})
+    return g
+
+
+def random_operations(g, count, seed=0):
+    """
+    Yield random curation ops valid against the graph as it evolves.
+    Merges and splits alternate so the scene count stays roughly stable.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        scene_count = len(g.get_nodes_by_label('Scene'))
+        kind = ('merge', 'split', 'rename')[i % 3]
+        if kind == 'merge':
+            start = rng.randrange(1, scene_count - 1)
+            yield {"op": "merge", "level": "scene", "indices": [start, start + 1],
+                   "heading": f"MERGED {i}"}
+        elif kind == 'split':
+            while True:
+                index = rng.randrange(1, scene_count + 1)
+                scene = operations.resolve_path(g, [index])
+                child_count = len(operations._get_child_edges(g, scene.id))
+                if child_count >= 2:
+                    break
+            yield {"op": "split", "level": "scene", "index": index,
+                   "at_child_index": rng.randrange(1, child_count),
+                   "heading_before": None, "heading_after": None}
+        else:
+            yield {"op": "rename", "level": "scene",
+                   "index": rng.randrange(1, scene_count + 1), "heading": f"RENAMED {i}"}
+
+
+def bench_curation(args):
+    start = time.perf_counter()
+    g = build_synthetic_graph(scenes=args.scenes, seed=args.seed)
+    print(f"Built graph: {len(g.nodes)} nodes, {len(g.edges)} edges "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    counts = {}
+    elapsed = 0.0
+    for seq, op in enumerate(random_operations(g, args.ops, seed=args.seed), start=1):
+        start = time.perf_counter()
+        operations.apply_operations(g, [op], start=seq)
+        elapsed += time.perf_counter() - start
+        counts[op["op"]] = counts.get(op["op"], 0) + 1
+    print(f"Replayed {args.ops} curation ops {counts} in {elapsed:.2f}s "
+          f"({elapsed / args.ops * 1000:.2f} ms/op)")
+
+
+def check_hierarchy(g):
+    """Return a description of the first inconsistency at scene level, or None."""
+    volume = g.get_nodes_by_label('Volume')[0]
+    edges = sorted(g.get_edges_from(volume.id, 'CONTAINS'), key=lambda e: e.properties['index'])
+    for i, edge in enumerate(edges, start=1):
+        scene = g.nodes.get(edge.to_id)
+        if scene is None:
+            return f"dangling CONTAINS edge to scene {i}"
+        if edge.properties['index'] != i or scene.properties['index'] != i:
+            return f"scene {i} numbered {edge.properties['index']}/{scene.properties['index']}"
+        if len(g.get_edges_to(scene.id, 'CONTAINS')) != 1:
+            return f"scene {i} has several parents"
+    if len(edges) != len(g.get_nodes_by_label('Scene')):
+        return "orphaned scene"
+    return None
+
+
+def bench_stress(args):
+    from engine.api import state
+
+    workdir = Path(tempfile.mkdtemp())
+    build_synthetic_graph(scenes=args.scenes, words=1, seed=args.seed).save(str(workdir / 'graph.json'))
+    state.load(workdir / 'graph.json', workdir / 'curation.json')
+
+    stop = threading.Event()
+    counts = {'ops': 0, 'rejected': 0, 'reads': 0, 'serialized': 0}
+    problems = []
+
+    def writer(seed):
+        rng = random.Random(seed)
+        for _ in range(args.ops // args.threads):
+            with state.reading() as g:
+                scene_count = len(g.get_nodes_by_label('Scene'))
+            index = rng.randrange(1, scene_count)
+            op = rng.choice([
+                {"op": "merge", "level": "scene", "indices": [index, index + 1], "heading": "M"},
+                {"op": "split", "level": "scene", "index": index, "at_child_index": 1},
+                {"op": "rename", "level": "scene", "index": index, "heading": "R"},
+            ])
+            try:
+                state.apply_operations([op])
+                counts['ops'] += 1
+            except ValueError:
+                counts['rejected'] += 1     # e.g. a scene left with one shot
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with state.reading() as g:
+                    problem = check_hierarchy(g)
+                    if counts['reads'] % 10 == 0:
+                        g.to_dict()
+                        counts['serialized'] += 1
+            except Exception as e:      # e.g. a dict resized mid-iteration
+                problem = repr(e)
+            counts['reads'] += 1
+            if problem:
+                problems.append(problem)
+
+    readers = [threading.Thread(target=reader) for _ in range(args.threads)]
+    writers = [threading.Thread(target=writer, args=(args.seed + i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.threads} writers, {args.threads} readers in {elapsed:.2f}s: {counts}")
+    if problems:
+        print(f"FAILED: {len(problems)} inconsistent reads, e.g. {problems[0]}")
+        sys.exit(1)
+    print("OK: no reader observed a half-applied operation")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('benchmark', nargs='?', default='curation', choices=['curation', 'stress'])
+    parser.add_argument('--scenes', type=int, default=None)
+    parser.add_argument('--ops', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.benchmark == 'stress':
+        args.scenes = args.scenes or 200
+        bench_stress(args)
+    else:
+        args.scenes = args.scenes or 2000
+        bench_curation(args)
+
+
+if __name__ == '__main__':
+    main()
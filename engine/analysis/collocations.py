@@ -0,0 +1,127 @@
+"""
+Collocations: which terms keep company with a term, and how surprisingly.
+
+Pairs are counted either within a ±window of token positions (never across
+a sentence boundary) or once per sentence both terms occur in (window 0).
+Counting is array-based: over the corpus as one token array in reading
+order (TermMatrices.tokens), each offset 1..window is a single vectorized
+comparison of the array with itself shifted. Sentence co-occurrence is
+the product of the binary sentence-by-term matrix with its transpose.
+
+The symmetric pair-count matrix is treated as a contingency table, so for a
+pair (x, y) with observed count O and expected E = row(x) * col(y) / N:
+
+    pmi      log2(O / E)
+    t        (O - E) / sqrt(O)
+    llr      G2 over the 2x2 table of x / not x against y / not y
+
+Pair matrices are cached per window until a delta changes some sentence's
+terms; top-N lists for a term are computed from its row on request.
+"""
+
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from engine.analysis.matrices import TermMatrices
+from engine.graph.model import Graph
+from engine.index.text import TextIndex, touched_sentences
+
+MEASURES = ("llr", "pmi", "t")
+
+
+class Collocations:
+    def __init__(self, text: TextIndex, matrices: TermMatrices):
+        self._text = text
+        self._matrices = matrices
+        self._pairs = {}        # window -> (directed pair counts, symmetric pair counts)
+        self._lock = threading.Lock()
+
+    def top(self, term: str, window: int = 4, measure: str = "llr",
+            limit: int = 20, min_count: int = 2) -> list:
+        """
+        Collocates of term ranked by measure, each with its pair count, how
+        often it comes before/after term (window > 0), and all three scores.
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure {measure!r}; use one of {', '.join(MEASURES)}")
+        x = self._matrices.column(term)
+        if x is None:
+            return []
+        directed, pairs = self._pair_counts(window)
+        row = pairs.getrow(x)
+        keep = (row.data >= min_count) & (row.indices != x)
+        collocates, observed = row.indices[keep], row.data[keep].astype(np.float64)
+        if not len(collocates):
+            return []
+        totals = np.asarray(pairs.sum(axis=1)).ravel()
+        scores = association(observed, totals[x], totals[collocates], totals.sum())
+        top = np.argsort(-scores[measure])[:limit]
+        vocabulary = self._matrices.vocabulary
+        results = []
+        for i in top:
+            y = collocates[i]
+            result = {"term": vocabulary[y], "count": int(observed[i])}
+            if directed is not None:
+                result["before"] = int(directed[y, x])
+                result["after"] = int(directed[x, y])
+            result.update({name: round(float(scores[name][i]), 4) for name in MEASURES})
+            results.append(result)
+        return results
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph, text: TextIndex = None):
+        if text is not None:
+            self._text = text
+        self._pairs.clear()
+
+    def apply(self, g: Graph, delta: dict):
+        if touched_sentences(g, delta, self._text.sentences()):
+            self._pairs.clear()
+
+    # --- counting ---
+
+    def _pair_counts(self, window: int) -> tuple:
+        with self._lock:
+            if window not in self._pairs:
+                if window == 0:
+                    present, _ = self._matrices.counts("Sentence")
+                    present = (present > 0).astype(np.int64)
+                    pairs = (present.T @ present).tocsr()
+                    pairs.setdiag(0)
+                    pairs.eliminate_zeros()
+                    self._pairs[window] = (None, pairs)
+                else:
+                    columns, sentences, _ = self._matrices.tokens()
+                    size = len(self._matrices.vocabulary)
+                    left, right = [], []
+                    for offset in range(1, window + 1):
+                        same = sentences[offset:] == sentences[:-offset]
+                        left.append(columns[:-offset][same])
+                        right.append(columns[offset:][same])
+                    left = np.concatenate(left) if left else np.zeros(0, np.int64)
+                    right = np.concatenate(right) if right else np.zeros(0, np.int64)
+                    directed = sparse.csr_matrix(
+                        (np.ones(len(left), dtype=np.int64), (left, right)), shape=(size, size)
+                    )
+                    self._pairs[window] = (directed, (directed + directed.T).tocsr())
+            return self._pairs[window]
+
+
+def association(observed, row_total, col_totals, total) -> dict:
+    """PMI, t-score and log-likelihood of pair counts against their marginals."""
+    expected = row_total * col_totals / total
+    o11, o12, o21 = observed, row_total - observed, col_totals - observed
+    o22 = total - row_total - col_totals + observed
+    e11, e12 = expected, row_total * (total - col_totals) / total
+    e21, e22 = (total - row_total) * col_totals / total, (total - row_total) * (total - col_totals) / total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g2 = 2 * sum(np.where(o > 0, o * np.log(o / e), 0)
+                     for o, e in ((o11, e11), (o12, e12), (o21, e21), (o22, e22)))
+        return {
+            "llr": np.where(observed > expected, g2, -g2),
+            "pmi": np.log2(observed / expected),
+            "t": (observed - expected) / np.sqrt(observed),
+        }
@@ -0,0 +1,27 @@
+"""
+Term importance from lexicon counts, after the archive's assign_term_values.
+
+Each term's count is divided by the range of counts and placed by its order
+of magnitude: ratios of 1 or more get minus the number of integer digits,
+smaller ones the position of the first nonzero decimal. The value is that
+order times one over the range of orders, so rarer terms weigh more; terms
+seen once get the full 1.0.
+
+The archive computed this with a pandas apply that split each ratio's
+string form, then a Python loop for the single counts; here it is a few
+array operations over all terms at once.
+"""
+
+import numpy as np
+
+
+def term_importance(counts) -> np.ndarray:
+    """Importance of each term, given its occurrence count (all counts >= 1)."""
+    counts = np.asarray(counts, dtype=np.float64)
+    if not len(counts):
+        return np.zeros(0)
+    count_range = counts.max() - counts.min() or 1
+    exponent = np.floor(np.log10(counts / count_range))
+    magnitude = np.where(exponent >= 0, -(exponent + 1), -exponent)
+    magnitude_range = magnitude.max() - magnitude.min() or 1
+    return np.where(counts == 1, 1.0, magnitude / magnitude_range)
@@ -0,0 +1,155 @@
+"""
+Distinctive terms per scene and per speaker, by log-likelihood keyness.
+
+Each scene (or each speaker's dialogue) is compared with the rest of the
+corpus; a term ranks by its G2 statistic (Rayson & Garside), keeping only
+terms used more than the rest of the corpus would predict.
+
+Keyness is measured against corpus totals, which merges, splits and renames
+never change, so a ranking stays valid until its own scene or speaker is
+touched. Rankings are computed on first request (or by warm()) and cached;
+a delta invalidates only the scenes whose words changed and the speakers of
+the paragraphs it changed. (TF-IDF would not allow this: every scene's idf
+moves whenever any scene does.)
+"""
+
+import threading
+
+import numpy as np
+
+from engine.analysis.matrices import TermMatrices
+from engine.graph.model import Graph
+from engine.index.hierarchy import HierarchyIndex
+from engine.index.order import OrderIndex
+from engine.index.text import touched_sentences
+
+TOP_TERMS = 100     # terms kept per ranking
+
+
+class DistinctiveTerms:
+    def __init__(self, hierarchy: HierarchyIndex, order: OrderIndex, matrices: TermMatrices):
+        self._hierarchy = hierarchy
+        self._order = order
+        self._matrices = matrices
+        self._speaker_of = {}   # paragraph id -> speaker, for dialogue paragraphs
+        self._corpus = None     # dense corpus counts, or None to recompute
+        self._scenes = {}       # scene id -> ranking
+        self._speakers = {}     # speaker -> ranking
+        self._lock = threading.Lock()
+
+    def scene(self, scene_id) -> list:
+        with self._lock:
+            if scene_id not in self._scenes:
+                sentences = self._hierarchy.descendants(scene_id, "Sentence")
+                self._scenes[scene_id] = self._rank(self._matrices.vector(sentences))
+            return self._scenes[scene_id]
+
+    def speakers(self) -> dict:
+        """Speaker -> number of dialogue paragraphs."""
+        counts = {}
+        for speaker in self._speaker_of.values():
+            counts[speaker] = counts.get(speaker, 0) + 1
+        return counts
+
+    def speaker(self, name: str) -> list:
+        with self._lock:
+            if name not in self._speakers:
+                paragraphs = [p for p, speaker in self._speaker_of.items() if speaker == name]
+                sentences = [s for p in paragraphs for s in self._hierarchy.descendants(p, "Sentence")]
+                self._speakers[name] = self._rank(self._matrices.vector(sentences))
+            return self._speakers[name]
+
+    def warm(self):
+        """Compute every ranking ahead of the first request."""
+        for scene_id in self._order.slice("Scene", 0, None):
+            self.scene(scene_id)
+        for name in self.speakers():
+            self.speaker(name)
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph):
+        self._speaker_of = {
+            p.id: p.properties["speaker"]
+            for p in g.get_nodes_by_label("Paragraph") if p.properties.get("speaker")
+        }
+        self._corpus = None
+        self._scenes.clear()
+        self._speakers.clear()
+
+    def apply(self, g: Graph, delta: dict):
+        """Invalidate what a delta touched; run after the hierarchy and matrices."""
+        paragraphs = set()
+        for nd in delta["nodes"]["removed"]:
+            self._scenes.pop(nd["id"], None)
+            speaker = self._speaker_of.pop(nd["id"], None)
+            if speaker:
+                self._speakers.pop(speaker, None)
+        for nd in delta["nodes"]["added"]:
+            if "Paragraph" in nd["labels"]:
+                paragraphs.add(nd["id"])
+        for nd in delta["nodes"]["updated"]:
+            if "speaker" in nd["properties"]:
+                paragraphs.add(nd["id"])
+
+        sentences = touched_sentences(g, delta)
+        if sentences:
+            # Words moved between sentences; if any were gained or lost, every ranking is off
+            corpus = self._corpus
+            self._corpus = None
+            if corpus is not None and not np.array_equal(corpus, self._corpus_counts()):
+                self._scenes.clear()
+                self._speakers.clear()
+        for sentence_id in sentences:
+            self._scenes.pop(self._hierarchy.enclosing(sentence_id, "Scene"), None)
+            paragraphs.add(self._hierarchy.enclosing(sentence_id, "Paragraph"))
+
+        for paragraph_id in paragraphs:
+            old = self._speaker_of.pop(paragraph_id, None)
+            node = g.nodes.get(paragraph_id)
+            new = node.properties.get("speaker") if node else None
+            if new:
+                self._speaker_of[paragraph_id] = new
+            for speaker in (old, new):
+                if speaker:
+                    self._speakers.pop(speaker, None)
+
+    # --- scoring ---
+
+    def _corpus_counts(self) -> np.ndarray:
+        if self._corpus is None:
+            self._corpus = self._matrices.vector(self._order.slice("Sentence", 0, None))
+        return self._corpus
+
+    def _rank(self, counts: np.ndarray) -> list:
+        corpus = self._corpus_counts()
+        if len(counts) < len(corpus):
+            counts = np.pad(counts, (0, len(corpus) - len(counts)))
+        scores, expected = keyness(counts, corpus[:len(counts)])
+        top = np.argsort(-scores)[:TOP_TERMS]
+        vocabulary = self._matrices.vocabulary
+        return [
+            {"term": vocabulary[i], "count": int(counts[i]),
+             "expected": round(float(expected[i]), 3), "keyness": round(float(scores[i]), 3)}
+            for i in top if scores[i] > 0
+        ]
+
+
+def keyness(target: np.ndarray, corpus: np.ndarray) -> tuple:
+    """
+    (G2 scores, expected counts) of the target's term counts against the
+    rest of the corpus. Scores of terms the target underuses are negated.
+    """
+    target = target.astype(np.float64)
+    rest = corpus - target
+    c, d = target.sum(), rest.sum()
+    if c == 0 or d == 0:
+        return np.zeros_like(target), np.zeros_like(target)
+    both = target + rest
+    expected_target = c * both / (c + d)
+    expected_rest = d * both / (c + d)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g2 = 2 * (np.where(target > 0, target * np.log(target / expected_target), 0)
+                  + np.where(rest > 0, rest * np.log(rest / expected_rest), 0))
+    overused = target / c > rest / d
+    return np.where(overused, g2, -g2), expected_target
@@ -0,0 +1,172 @@
+"""
+Sparse term-by-unit count matrices for lexical analytics.
+
+For each hierarchy level from scene down to sentence, a SciPy CSR matrix
+whose rows are the level's units in reading order and whose columns are the
+lexicon's terms, holding occurrence counts. Frequencies, per-scene
+vocabularies and keyness then become vectorized operations.
+
+The sentence matrix is assembled from per-sentence rows read off the text
+index; a delta only drops the rows of the sentences it touched, so after a
+curation operation the next request re-reads just those. Sentences are in
+reading order, so each coarser unit covers a contiguous run of sentence rows
+and its counts are one sparse product away. Matrices are cached until a
+delta adds or removes something.
+
+tokens() lays the whole corpus out as flat arrays in reading order (term
+column, sentence ordinal, position), for analyses over token sequences such
+as collocations and n-grams; it is rebuilt when a delta touches any
+sentence's terms.
+"""
+
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from engine.graph.model import Graph
+from engine.index.hierarchy import HierarchyIndex
+from engine.index.order import OrderIndex
+from engine.index.text import TextIndex, touched_sentences
+
+UNIT_LEVELS = ["Scene", "Shot", "Paragraph", "Sentence"]
+
+
+class TermMatrices:
+    def __init__(self, hierarchy: HierarchyIndex, order: OrderIndex, text: TextIndex):
+        self._hierarchy = hierarchy
+        self._order = order
+        self._text = text
+        self._vocabulary = []   # column -> term text
+        self._columns = {}      # term text -> column
+        self._rows = {}         # sentence id -> (columns, counts) arrays
+        self._cache = {}        # label -> (matrix, row ids), until the next delta
+        self._tokens = None     # (columns, sentence ordinals, positions), or None to rebuild
+        self._lock = threading.RLock()
+
+    @property
+    def vocabulary(self) -> list:
+        """Term text of each column; treat as read-only."""
+        return self._vocabulary
+
+    def column(self, term: str):
+        return self._columns.get(self._text.normalize(term))
+
+    def counts(self, label: str) -> tuple:
+        """(CSR matrix of counts, unit ids of its rows) for a level, e.g. "Scene"."""
+        if label not in UNIT_LEVELS:
+            raise ValueError(f"No term matrix for level {label!r}")
+        with self._lock:
+            if label not in self._cache:
+                if label == "Sentence":
+                    self._cache[label] = self._sentence_counts()
+                else:
+                    self._cache[label] = self._unit_counts(label)
+            return self._cache[label]
+
+    def vector(self, sentence_ids) -> np.ndarray:
+        """Dense counts over the vocabulary, summed over the given sentences."""
+        with self._lock:
+            rows = [self._row(sentence_id) for sentence_id in sentence_ids]
+            size = len(self._vocabulary)
+        if not rows:
+            return np.zeros(size)
+        columns = np.concatenate([columns for columns, _ in rows])
+        counts = np.concatenate([counts for _, counts in rows])
+        return np.bincount(columns, weights=counts, minlength=size)
+
+    def tokens(self) -> tuple:
+        """
+        (term columns, sentence ordinals, positions) of every token, as arrays
+        in reading order. The same tuple is returned until it is rebuilt.
+        """
+        with self._lock:
+            if self._tokens is None:
+                columns, sentences, positions = [], [], []
+                ordinal = self._order.ordinal
+                for term, postings in self._text.postings().items():
+                    column = self._column_for(term)
+                    for sentence_id, at in postings.items():
+                        columns.extend([column] * len(at))
+                        sentences.extend([ordinal(sentence_id)] * len(at))
+                        positions.extend(at)
+                columns = np.array(columns, dtype=np.int64)
+                sentences = np.array(sentences, dtype=np.int64)
+                positions = np.array(positions, dtype=np.int64)
+                order = np.lexsort((positions, sentences))
+                self._tokens = columns[order], sentences[order], positions[order]
+            return self._tokens
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph, text: TextIndex = None):
+        """Start over; pass text when the state has swapped in a new text index."""
+        if text is not None:
+            self._text = text
+        self._vocabulary = sorted(self._text.postings())
+        self._columns = {term: i for i, term in enumerate(self._vocabulary)}
+        self._rows.clear()
+        self._cache.clear()
+        self._tokens = None
+
+    def apply(self, g: Graph, delta: dict):
+        """Drop the rows of touched sentences; run after the text index's apply."""
+        touched = touched_sentences(g, delta, self._rows)
+        for sentence_id in touched:
+            self._rows.pop(sentence_id, None)
+        # Renames and renumbering leave every count and row order as it was
+        if any(delta[kind][change] for kind in ("nodes", "edges") for change in ("added", "removed")):
+            self._cache.clear()
+            self._tokens = None
+        elif touched:
+            self._tokens = None
+
+    def _row(self, sentence_id):
+        row = self._rows.get(sentence_id)
+        if row is None:
+            terms = self._text.sentence_counts(sentence_id)
+            columns = np.fromiter((self._column_for(t) for t in terms), dtype=np.int32,
+                                  count=len(terms))
+            counts = np.fromiter(terms.values(), dtype=np.int32, count=len(terms))
+            row = self._rows[sentence_id] = (columns, counts)
+        return row
+
+    def _column_for(self, term: str) -> int:
+        column = self._columns.get(term)
+        if column is None:
+            column = self._columns[term] = len(self._vocabulary)
+            self._vocabulary.append(term)
+        return column
+
+    def _sentence_counts(self) -> tuple:
+        ids = self._order.slice("Sentence", 0, None)
+        rows = [self._row(sentence_id) for sentence_id in ids]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(columns) for columns, _ in rows], out=indptr[1:])
+        indices = np.concatenate([columns for columns, _ in rows]) if rows else np.zeros(0, np.int32)
+        data = np.concatenate([counts for _, counts in rows]) if rows else np.zeros(0, np.int32)
+        matrix = sparse.csr_matrix((data, indices, indptr),
+                                   shape=(len(rows), len(self._vocabulary)))
+        return matrix, ids
+
+    def _unit_counts(self, label: str) -> tuple:
+        """Sum each unit's contiguous run of sentence rows with one sparse product."""
+        sentences, sentence_ids = self.counts("Sentence")
+        ordinal = self._order.ordinal
+        ids = self._order.slice(label, 0, None)
+        starts = np.zeros(len(ids), dtype=np.int64)
+        lengths = np.zeros(len(ids), dtype=np.int64)
+        for i, unit_id in enumerate(ids):
+            members = self._hierarchy.descendants(unit_id, "Sentence")
+            if members:
+                starts[i] = ordinal(members[0])
+                lengths[i] = len(members)
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        membership = sparse.csr_matrix(
+            (np.ones(indptr[-1], dtype=np.int32), indices, indptr),
+            shape=(len(ids), len(sentence_ids)),
+        )
+        return (membership @ sentences).tocsr(), ids
+
@@ -0,0 +1,155 @@
+"""
+Speaker interaction network, derived from dialogue paragraphs.
+
+Two weighted relations between speakers:
+  - turns: B's dialogue directly follows A's within a scene (action lines in
+    between are skipped), counted per ordered pair;
+  - co-presence: A and B both speak in a scene, counted per scene.
+
+The paragraphs are read once in reading order into integer arrays (speaker,
+scene); the counts are then array operations, and the centrality metrics
+(weighted degree, PageRank over turns, eigenvector over co-presence) are
+computed for all speakers at once. The result is cached until a delta adds
+or removes paragraphs or scenes, or changes a speaker or a scene's index.
+"""
+
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from engine.graph.model import Graph
+from engine.index.hierarchy import HierarchyIndex
+from engine.index.order import OrderIndex
+
+
+class SpeakerNetwork:
+    def __init__(self, hierarchy: HierarchyIndex, order: OrderIndex):
+        self._hierarchy = hierarchy
+        self._order = order
+        self._network = None    # cached result of network()
+        self._lock = threading.Lock()
+
+    def network(self, g: Graph) -> dict:
+        """{"nodes": [speaker ...], "edges": [pair ...]}, as served by /network/speakers."""
+        with self._lock:
+            if self._network is None:
+                self._network = self._build(g)
+            return self._network
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph):
+        self._network = None
+
+    def apply(self, g: Graph, delta: dict):
+        for nd in delta["nodes"]["added"] + delta["nodes"]["removed"]:
+            if "Paragraph" in nd["labels"] or "Scene" in nd["labels"]:
+                self._network = None
+                return
+        for nd in delta["nodes"]["updated"]:
+            node = g.nodes.get(nd["id"])
+            if node is None:
+                continue
+            if ("speaker" in nd["properties"]
+                    or ("Scene" in node.labels and "index" in nd["properties"])):
+                self._network = None
+                return
+
+    def _build(self, g: Graph) -> dict:
+        names, speaker_ids = [], {}
+        scene_ids, scene_numbers = [], {}
+        speakers, scenes = [], []
+        for para_id in self._order.slice("Paragraph", 0, None):
+            name = g.nodes[para_id].properties.get("speaker")
+            if not name:
+                continue
+            scene_id = self._hierarchy.enclosing(para_id, "Scene")
+            if name not in speaker_ids:
+                speaker_ids[name] = len(names)
+                names.append(name)
+            if scene_id not in scene_numbers:
+                scene_numbers[scene_id] = len(scene_ids)
+                scene_ids.append(scene_id)
+            speakers.append(speaker_ids[name])
+            scenes.append(scene_numbers[scene_id])
+        n = len(names)
+        speakers = np.array(speakers, dtype=np.int64)
+        scenes = np.array(scenes, dtype=np.int64)
+
+        # Turns: consecutive dialogue in the same scene by different speakers
+        turns = np.zeros((n, n))
+        if len(speakers) > 1:
+            follows = (scenes[1:] == scenes[:-1]) & (speakers[1:] != speakers[:-1])
+            np.add.at(turns, (speakers[:-1][follows], speakers[1:][follows]), 1)
+
+        # Co-presence: speakers x scenes incidence, multiplied by its transpose
+        presence = sparse.csr_matrix(
+            (np.ones(len(speakers)), (speakers, scenes)), shape=(n, len(scene_ids))
+        )
+        presence.data[:] = 1
+        shared = (presence @ presence.T).toarray()
+        lines = np.bincount(speakers, minlength=n)
+        scene_count = np.diag(shared).copy()
+        np.fill_diagonal(shared, 0)
+
+        pagerank = _pagerank(turns)
+        eigenvector = _eigenvector(shared)
+        degree = turns.sum(axis=0) + turns.sum(axis=1)
+
+        scene_index = [g.nodes[s].properties.get("index") if s in g.nodes else None
+                       for s in scene_ids]
+        nodes = [
+            {"id": names[i], "paragraphs": int(lines[i]), "scenes": int(scene_count[i]),
+             "turn_degree": int(degree[i]), "pagerank": round(float(pagerank[i]), 6),
+             "eigenvector": round(float(eigenvector[i]), 6)}
+            for i in range(n)
+        ]
+        edges = []
+        rows, cols = np.nonzero(np.triu(turns + turns.T + shared, k=1))
+        for a, b in zip(rows, cols):
+            both = np.intersect1d(presence[a].indices, presence[b].indices)
+            edges.append({
+                "from": names[a], "to": names[b],
+                "turns": int(turns[a, b] + turns[b, a]),
+                "turns_from": int(turns[a, b]), "turns_to": int(turns[b, a]),
+                "co_presence": int(shared[a, b]),
+                "scenes": sorted(scene_index[s] for s in both if scene_index[s] is not None),
+            })
+        nodes.sort(key=lambda node: -node["pagerank"])
+        return {"nodes": nodes, "edges": edges}
+
+
+def _pagerank(weights: np.ndarray, damping=0.85, iterations=100, tolerance=1e-10) -> np.ndarray:
+    """PageRank over a weighted adjacency matrix (row -> column)."""
+    n = len(weights)
+    if n == 0:
+        return np.zeros(0)
+    out = weights.sum(axis=1)
+    transition = np.divide(weights, out[:, None], out=np.zeros_like(weights),
+                           where=out[:, None] > 0)
+    rank = np.full(n, 1 / n)
+    for _ in range(iterations):
+        dangling = rank[out == 0].sum() / n
+        updated = (1 - damping) / n + damping * (rank @ transition + dangling)
+        if np.abs(updated - rank).sum() < tolerance:
+            return updated
+        rank = updated
+    return rank
+
+
+def _eigenvector(weights: np.ndarray, iterations=100, tolerance=1e-10) -> np.ndarray:
+    """Eigenvector centrality of a symmetric weighted matrix, scaled to max 1."""
+    n = len(weights)
+    if n == 0 or not weights.any():
+        return np.zeros(n)
+    # Shifting by the identity keeps power iteration from oscillating on bipartite parts
+    shifted = weights + np.eye(n)
+    vector = np.ones(n) / n
+    for _ in range(iterations):
+        updated = shifted @ vector
+        updated /= np.linalg.norm(updated)
+        if np.abs(updated - vector).sum() < tolerance:
+            break
+        vector = updated
+    return updated / updated.max()
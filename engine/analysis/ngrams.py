@@ -0,0 +1,108 @@
+"""
+N-gram index over the sentences' token streams, for recurring phrases.
+
+For each length n from 2 to 5, every run of n consecutive tokens inside a
+sentence is keyed by a 64-bit hash of its term columns. The index for a
+length is two arrays, hashes and token-stream offsets, sorted by hash and
+then reading order, so all occurrences of an n-gram are one contiguous run
+found by binary search, and counting every n-gram is a diff over run
+boundaries. Hash matches are checked against the tokens themselves.
+
+Nothing is built until a length is first asked for. The index is laid over
+TermMatrices.tokens() and is dropped whenever that stream is rebuilt, so it
+needs no maintenance of its own.
+"""
+
+import threading
+
+import numpy as np
+
+from engine.analysis.matrices import TermMatrices
+from engine.index.order import OrderIndex
+
+MIN_N, MAX_N = 2, 5
+_MULTIPLIER = 0x9E3779B97F4A7C15   # odd 64-bit constant; hashes wrap mod 2**64
+_MASK = (1 << 64) - 1
+
+
+class NgramIndex:
+    def __init__(self, order: OrderIndex, matrices: TermMatrices):
+        self._order = order
+        self._matrices = matrices
+        self._tokens = None     # the token stream the arrays below index into
+        self._grams = {}        # n -> (sorted hashes, stream offsets)
+        self._lock = threading.Lock()
+
+    def frequency(self, words: list) -> int:
+        with self._lock:
+            return len(self._match(words))
+
+    def locations(self, words: list) -> list:
+        """(sentence id, position of the first word) of every occurrence, in reading order."""
+        with self._lock:
+            starts = self._match(words)
+            _, sentences, positions = self._tokens
+        ids = self._order.slice("Sentence", 0, None)
+        return [(ids[sentences[start]], int(positions[start])) for start in starts]
+
+    def top(self, n: int, limit: int = 50, min_count: int = 2) -> list:
+        """The most frequent n-grams of length n, ties in order of first occurrence."""
+        with self._lock:
+            hashes, starts = self._index(n)
+            columns = self._tokens[0]
+        if not len(hashes):
+            return []
+        first = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+        counts = np.diff(np.r_[first, len(hashes)])
+        keep = counts >= min_count
+        first, counts = first[keep], counts[keep]
+        top = np.lexsort((starts[first], -counts))[:limit]
+        vocabulary = self._matrices.vocabulary
+        return [
+            {"ngram": " ".join(vocabulary[c] for c in columns[starts[first[i]]:starts[first[i]] + n]),
+             "count": int(counts[i])}
+            for i in top
+        ]
+
+    # --- lookup ---
+
+    def _match(self, words: list) -> np.ndarray:
+        """Stream offsets where words occur, in reading order."""
+        n = len(words)
+        if not MIN_N <= n <= MAX_N:
+            raise ValueError(f"N-grams are {MIN_N} to {MAX_N} words, not {n}")
+        hashes, starts = self._index(n)
+        query = [self._matrices.column(word) for word in words]
+        if None in query:
+            return starts[:0]
+        key = 0
+        for column in query:
+            key = (key * _MULTIPLIER + column + 1) & _MASK
+        key = np.uint64(key)
+        candidates = starts[np.searchsorted(hashes, key, "left"):np.searchsorted(hashes, key, "right")]
+        columns = self._tokens[0]
+        same = np.ones(len(candidates), dtype=bool)
+        for i, column in enumerate(query):
+            same &= columns[candidates + i] == column
+        return candidates[same]
+
+    def _index(self, n: int) -> tuple:
+        tokens = self._matrices.tokens()
+        if tokens is not self._tokens:
+            self._tokens = tokens
+            self._grams.clear()
+        if n not in self._grams:
+            columns, sentences, positions = tokens
+            count = len(columns) - n + 1
+            if count <= 0:
+                self._grams[n] = (np.zeros(0, np.uint64), np.zeros(0, np.int64))
+                return self._grams[n]
+            # An n-gram starts wherever the token n-1 ahead is in the same sentence, n-1 on
+            whole = (sentences[n - 1:] == sentences[:count]) & (positions[n - 1:] - positions[:count] == n - 1)
+            starts = np.flatnonzero(whole)
+            hashes = np.zeros(len(starts), dtype=np.uint64)
+            for i in range(n):
+                hashes = hashes * np.uint64(_MULTIPLIER) + (columns[starts + i] + 1).astype(np.uint64)
+            order = np.argsort(hashes, kind="stable")
+            self._grams[n] = (hashes[order], starts[order])
+        return self._grams[n]
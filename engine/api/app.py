@@ -1,18 +1,21 @@
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
 from engine.api import state
-from engine.api.routes import graph, curate
+from engine.api.routes import graph, curate, changes, search, terms, analysis
 
 GRAPH_PATH = Path("model/data/graph.json")
 CURATION_PATH = Path("model/config/curation.json")
+SNAPSHOT_PATH = Path("model/data/graph_snapshot.pkl")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    state.load(GRAPH_PATH, CURATION_PATH)
+    # Load in the background so "/" answers while the graph warms up
+    state.load_in_background(GRAPH_PATH, CURATION_PATH, SNAPSHOT_PATH)
     yield
 
 
@@ -20,8 +23,28 @@ app = FastAPI(title="LottaStrands Engine", lifespan=lifespan)
 
 app.include_router(graph.router)
 app.include_router(curate.router, prefix="/curate")
+app.include_router(changes.router)
+app.include_router(search.router)
+app.include_router(terms.router)
+app.include_router(analysis.router)
+
+
+@app.exception_handler(state.NotReady)
+async def not_ready(request: Request, exc: state.NotReady):
+    """Graph endpoints answer 503 with loading progress until the graph is ready."""
+    return JSONResponse(status_code=503, content=state.get_status(),
+                        headers={"Retry-After": "1"})
 
 
 @app.get("/")
 def root():
-    return {"status": "ok", "service": "LottaStrands Engine"}
+    return {"status": "ok", "service": "LottaStrands Engine", "graph": state.get_status()}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once the graph is loaded, 503 with progress before."""
+    status = state.get_status()
+    if not state.is_ready():
+        return JSONResponse(status_code=503, content=status)
+    return status
@@ -0,0 +1,73 @@
+"""
+Change feed: a bounded, versioned history of graph deltas.
+
+Every applied curation transaction is published as (version, delta), where
+version is the graph version after it. Readers resume from the version they
+last saw; if that is older than the retained history (or not a version this
+feed knows about) they must refetch and continue from the current version.
+
+Publishing happens on the threadpool that runs the sync route handlers,
+while readers are async streaming responses, so waiters are woken with
+loop.call_soon_threadsafe.
+"""
+
+import asyncio
+import threading
+from collections import deque
+
+
+class ChangeFeed:
+    def __init__(self, maxlen=1000):
+        self._entries = deque(maxlen=maxlen)  # (version, delta), oldest first
+        self._floor = 0      # history covers versions (floor, version]
+        self._version = 0
+        self._lock = threading.Lock()
+        self._waiters = set()  # (loop, asyncio.Event)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def reset(self, version: int):
+        """Drop history; the feed restarts at version (e.g. after a load)."""
+        with self._lock:
+            self._entries.clear()
+            self._floor = self._version = version
+        self._notify()
+
+    def publish(self, version: int, delta: dict):
+        with self._lock:
+            if len(self._entries) == self._entries.maxlen:
+                self._floor = self._entries[0][0]
+            self._entries.append((version, delta))
+            self._version = version
+        self._notify()
+
+    def since(self, version: int):
+        """
+        Entries newer than version, oldest first, or None if the history
+        cannot bridge the gap and the reader has to refetch.
+        """
+        with self._lock:
+            if version < self._floor or version > self._version:
+                return None
+            return [(v, d) for v, d in self._entries if v > version]
+
+    async def wait(self, version: int, timeout: float) -> bool:
+        """Wait until the feed moves past version; False on timeout."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        self._waiters.add(waiter)
+        try:
+            if self._version != version:
+                return True
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(waiter)
+
+    def _notify(self):
+        for loop, event in list(self._waiters):
+            loop.call_soon_threadsafe(event.set)
@@ -0,0 +1,70 @@
+"""
+Reader-writer lock for the in-process working graph.
+
+FastAPI runs the sync route handlers on a threadpool, so several requests
+can touch the same Graph at once. Readers share the lock and never wait on
+each other; a writer holds it alone, so nobody can observe a half-applied
+merge or split. Derived structures that fill caches on first read can
+therefore be filled by two readers at once; each guards its fills with a
+plain lock of its own, taken inside the read lock and never the other way.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer.
+
+    Writers are preferred: once a writer is waiting, new readers queue behind
+    it, so a steady stream of reads cannot starve edits. The write lock is
+    re-entrant, and the thread holding it may also take the read lock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = None          # ident of the thread holding the write lock
+        self._write_depth = 0
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        with self._cond:
+            owned = self._writer == me
+            if not owned:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+        try:
+            yield
+        finally:
+            if not owned:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+            self._write_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._cond.notify_all()
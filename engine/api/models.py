@@ -1,15 +1,24 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
+
+
+# Nodes are addressed by hierarchical path: "parent" holds the indices of the
+# ancestors below the volume, e.g. [12, 3] for the paragraphs of scene 12 /
+# shot 3. Indices are only unique among siblings. Scenes use parent [].
 
 
 class MergeRequest(BaseModel):
+    op: Literal["merge"] = "merge"
     level: str          # "scene", "shot", "paragraph", etc.
-    indices: List[int]  # indices of nodes to merge, in order
-    heading: str        # heading for the merged node
+    parent: List[int] = []
+    indices: List[int]  # indices of sibling nodes to merge, in order
+    heading: Optional[str] = None  # heading for the merged node
 
 
 class SplitRequest(BaseModel):
+    op: Literal["split"] = "split"
     level: str
+    parent: List[int] = []
     index: int          # index of the node to split
     at_child_index: int # first child index that goes into the second half
     heading_before: Optional[str] = None
@@ -17,6 +26,19 @@ class SplitRequest(BaseModel):
 
 
 class RenameRequest(BaseModel):
+    op: Literal["rename"] = "rename"
     level: str
+    parent: List[int] = []
     index: int
     heading: str
+
+
+class MergeTermsRequest(BaseModel):
+    op: Literal["merge_terms"] = "merge_terms"
+    terms: List[str]    # texts of the variant terms, e.g. ["dude,", "dood"]
+    into: str           # text of the term they are folded into
+
+
+class BatchRequest(BaseModel):
+    # Applied in order, all or nothing; each entry must set "op"
+    operations: List[Union[MergeRequest, SplitRequest, RenameRequest, MergeTermsRequest]]
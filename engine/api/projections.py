@@ -0,0 +1,101 @@
+"""
+Read-side projections of the working graph, kept current from deltas.
+
+A projection is built once from the whole graph after a load, then patched
+with each published delta (see engine.graph.diff.summarize) so reads never
+have to walk the graph. Deltas are applied under the graph's write lock,
+after the transaction has committed, so the graph they are read against is
+the post-change one.
+"""
+
+import threading
+
+from engine.graph.model import Graph
+from engine.index.hierarchy import HierarchyIndex
+
+
+class SceneSummaries:
+    """
+    One summary per scene, as served by /scenes:
+    id, index, heading, shot_count, paragraph_count, speakers, word_count.
+
+    A delta touching a scene's contents recomputes just that scene, in
+    O(size of the scene); one that only renumbers or renames scenes patches
+    their index and heading. The sorted list is rebuilt lazily on next read.
+    Scenes and their contents are found through the hierarchy index, which
+    must be brought up to date with each delta first.
+    """
+
+    def __init__(self, hierarchy: HierarchyIndex):
+        self._hierarchy = hierarchy
+        self._by_id = {}     # scene id -> summary dict
+        self._ordered = []   # summaries sorted by index, or None when stale
+        self._lock = threading.Lock()
+
+    def rebuild(self, g: Graph):
+        self._by_id = {scene.id: self._summarize(g, scene)
+                       for scene in g.get_nodes_by_label("Scene")}
+        self._ordered = None
+
+    def apply(self, g: Graph, delta: dict):
+        scene_of = self._scene_of
+        dirty = set()
+        for nd in delta["nodes"]["removed"]:
+            self._by_id.pop(nd["id"], None)
+        for nd in delta["nodes"]["added"]:
+            dirty.add(scene_of(nd["id"]))
+        for nd in delta["nodes"]["updated"]:
+            summary = self._by_id.get(nd["id"])
+            if summary is not None and set(nd["properties"]) <= {"index", "heading"}:
+                # A new dict: ones already handed out may still be serializing
+                self._by_id[nd["id"]] = {**summary, **nd["properties"]}
+            else:
+                dirty.add(scene_of(nd["id"]))
+        for ed in delta["edges"]["added"] + delta["edges"]["removed"]:
+            dirty.add(scene_of(ed["from"]))
+        for ed in delta["edges"]["updated"]:
+            edge = g.get_edge(ed["id"])
+            if edge is not None:
+                dirty.add(scene_of(edge.from_id))
+        dirty.discard(None)
+        for scene_id in dirty:
+            self._by_id[scene_id] = self._summarize(g, g.nodes[scene_id])
+        self._ordered = None
+
+    def list(self) -> list:
+        """
+        Summaries in scene order. Treat as read-only; it is shared between
+        reads, and may be serialized after the read lock is released, so
+        apply() replaces summaries and the list rather than changing them.
+        """
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = sorted(self._by_id.values(), key=lambda s: s["index"] or 0)
+            return self._ordered
+
+    def _scene_of(self, node_id: str):
+        """Id of the scene that contains node_id (or is it), else None."""
+        return self._hierarchy.enclosing(node_id, "Scene")
+
+    def _summarize(self, g: Graph, scene) -> dict:
+        hierarchy = self._hierarchy
+        speakers = []
+        paragraph_count = 0
+        for para_id in hierarchy.descendants(scene.id, "Paragraph"):
+            paragraph_count += 1
+            speaker = g.nodes[para_id].properties.get("speaker")
+            if speaker and speaker not in speakers:
+                speakers.append(speaker)
+        word_count = 0
+        for sentence_id in hierarchy.descendants(scene.id, "Sentence"):
+            word_count += sum(1 for e in g.get_edges_from(sentence_id, "CONTAINS")
+                              if "position" in e.properties)
+        return {
+            "id": scene.id,
+            "index": scene.properties.get("index"),
+            "heading": scene.properties.get("heading"),
+            "shot_count": len(hierarchy.descendants(scene.id, "Shot")),
+            "paragraph_count": paragraph_count,
+            "speakers": speakers,
+            "word_count": word_count,
+        }
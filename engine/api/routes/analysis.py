@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Query
+from engine.api import state
+
+router = APIRouter()
+
+
+@router.get("/scenes/{scene_id}/distinctive")
+def get_scene_distinctive(scene_id: str, limit: int = Query(20, ge=1, le=100)):
+    """Terms that characterize a scene against the rest of the corpus, by keyness."""
+    with state.reading() as g:
+        node = g.nodes.get(scene_id)
+        if node is None or "Scene" not in node.labels:
+            raise HTTPException(status_code=404, detail=f"No scene {scene_id}")
+        return {
+            "scene": scene_id,
+            "index": node.properties.get("index"),
+            "heading": node.properties.get("heading"),
+            "terms": state.get_distinctive_terms().scene(scene_id)[:limit],
+        }
+
+
+@router.get("/speakers")
+def get_speakers():
+    """Dialogue speakers with their paragraph counts, most talkative first."""
+    with state.reading():
+        counts = state.get_distinctive_terms().speakers()
+        return [{"speaker": name, "paragraphs": n}
+                for name, n in sorted(counts.items(), key=lambda item: -item[1])]
+
+
+@router.get("/speakers/{name}/distinctive")
+def get_speaker_distinctive(name: str, limit: int = Query(20, ge=1, le=100)):
+    """Terms that characterize a speaker's dialogue against the rest of the corpus."""
+    with state.reading():
+        distinctive = state.get_distinctive_terms()
+        if name not in distinctive.speakers():
+            raise HTTPException(status_code=404, detail=f"No speaker {name!r}")
+        return {"speaker": name, "terms": distinctive.speaker(name)[:limit]}
+
+
+@router.get("/network/speakers")
+def get_speaker_network():
+    """
+    Who speaks to whom: speakers with centrality metrics, and pairs weighted
+    by dialogue turns and by the scenes they share.
+    """
+    with state.reading() as g:
+        return state.get_speaker_network().network(g)
@@ -0,0 +1,65 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+
+from engine.api import state
+
+router = APIRouter()
+
+KEEPALIVE_SECONDS = 15
+SYNC_SECONDS = 1  # how often an idle stream checks for other workers' changes
+
+
+def _event(name: str, version: int, data: dict) -> str:
+    return f"event: {name}\nid: {version}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/changes")
+async def changes(request: Request, since: Optional[int] = None,
+                  last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent event stream of graph changes.
+
+    Each applied curation transaction arrives as a "delta" event whose id is
+    the graph version after it, with data {"version", "delta"} in the same
+    shape the curation endpoints return. Resume with ?since=<version> or the
+    standard Last-Event-ID header; without either the stream starts at the
+    current version. If the requested version is no longer in the feed's
+    history a "reset" event is sent first: refetch, then carry on with the
+    deltas that follow it.
+
+    Changes applied by other worker processes are picked up by polling the
+    shared curation log (state.sync) while the stream is idle.
+    """
+    feed = state.get_feed()
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def stream():
+        await asyncio.to_thread(state.sync)
+        version = feed.version if since is None else since
+        idle = 0
+        while not await request.is_disconnected():
+            entries = feed.since(version)
+            if entries is None:
+                version = feed.version
+                yield _event("reset", version, {"version": version})
+                continue
+            for entry_version, delta in entries:
+                yield _event("delta", entry_version,
+                             {"version": entry_version, "delta": delta})
+                version = entry_version
+            if entries or await feed.wait(version, SYNC_SECONDS):
+                idle = 0
+                continue
+            await asyncio.to_thread(state.sync)
+            idle += SYNC_SECONDS
+            if idle >= KEEPALIVE_SECONDS:
+                idle = 0
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
@@ -1,18 +1,46 @@
 from fastapi import APIRouter, HTTPException
 from engine.api import state
-from engine.api.models import MergeRequest, SplitRequest, RenameRequest
-from engine.curate import operations
-from engine.graph.model import Graph
+from engine.api.models import (MergeRequest, SplitRequest, RenameRequest, MergeTermsRequest,
+                               BatchRequest)
 from pathlib import Path
-import json
+from typing import Optional
 
 router = APIRouter()
 
+# Every mutating endpoint responds with the net change it made, so clients
+# can patch local state instead of refetching:
+#
+#     {"status": "ok", "version": <graph version after the change>,
+#      "delta": {"nodes": {added, removed, updated}, "edges": {added, removed, updated}}}
+#
+# With ?dry_run=true the operation is applied inside a transaction, diffed and
+# rolled back, so nothing changes and nothing is recorded; the response has
+# "dry_run": true and the version is unchanged.
+#
+# With ?expected_version=N the change is only applied if the graph is still at
+# version N (other clients or workers may have moved it on); otherwise 409.
+
+
+def _apply(ops: list, dry_run: bool, expected_version: Optional[int]) -> dict:
+    """Apply operations atomically and build the delta response."""
+    try:
+        version, delta = state.apply_operations(ops, dry_run=dry_run,
+                                                expected_version=expected_version)
+    except state.VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = {"status": "ok", "version": version, "delta": delta}
+    if dry_run:
+        response["dry_run"] = True
+    return response
+
 
 @router.get("/preview")
 def preview():
     """Return current working graph state (all operations applied)."""
-    return state.get_graph().to_dict()
+    with state.reading() as g:
+        return g.to_dict()
 
 
 @router.get("/operations")
@@ -22,68 +50,57 @@ def get_operations():
 
 
 @router.post("/merge")
-def merge(req: MergeRequest):
-    g = state.get_graph()
-    try:
-        operations.merge_nodes(g, req.level, req.indices, req.heading)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    state.add_operation({
-        "op": "merge",
-        "level": req.level,
-        "indices": req.indices,
-        "heading": req.heading
-    })
-    return {"status": "ok", "scene_count": len(g.get_nodes_by_label("Scene"))}
+def merge(req: MergeRequest, dry_run: bool = False, expected_version: Optional[int] = None):
+    return _apply([dict(req)], dry_run, expected_version)
 
 
 @router.post("/split")
-def split(req: SplitRequest):
-    g = state.get_graph()
-    try:
-        operations.split_node(
-            g, req.level, req.index, req.at_child_index,
-            req.heading_before, req.heading_after
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    state.add_operation({
-        "op": "split",
-        "level": req.level,
-        "index": req.index,
-        "at_child_index": req.at_child_index,
-        "heading_before": req.heading_before,
-        "heading_after": req.heading_after
-    })
-    return {"status": "ok"}
+def split(req: SplitRequest, dry_run: bool = False, expected_version: Optional[int] = None):
+    return _apply([dict(req)], dry_run, expected_version)
 
 
 @router.post("/rename")
-def rename(req: RenameRequest):
-    g = state.get_graph()
-    try:
-        operations.rename_node(g, req.level, req.index, req.heading)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    state.add_operation({
-        "op": "rename",
-        "level": req.level,
-        "index": req.index,
-        "heading": req.heading
-    })
-    return {"status": "ok"}
+def rename(req: RenameRequest, dry_run: bool = False, expected_version: Optional[int] = None):
+    return _apply([dict(req)], dry_run, expected_version)
+
+
+@router.post("/merge_terms")
+def merge_terms(req: MergeTermsRequest, dry_run: bool = False,
+                expected_version: Optional[int] = None):
+    """Fold spelling variants into one term; see /terms/{text}/variants for candidates."""
+    return _apply([dict(req)], dry_run, expected_version)
+
+
+@router.post("/batch")
+def batch(req: BatchRequest, dry_run: bool = False, expected_version: Optional[int] = None):
+    """
+    Apply an ordered list of operations atomically.
+    On the first failure everything is rolled back and nothing is recorded.
+    Otherwise all operations are persisted in one write and a single
+    combined delta of the working graph is returned.
+    """
+    ops = [dict(op) for op in req.operations]
+    response = _apply(ops, dry_run, expected_version)
+    response["applied"] = len(ops)
+    return response
 
 
 @router.post("/save")
 def save():
-    """Write the current working graph to graph_curated.json."""
+    """Write the current working graph to graph_curated.json, and refresh the snapshot."""
     output_path = Path("model/data/graph_curated.json")
     state.save_curated(output_path)
+    state.save_snapshot()
     return {"status": "ok", "path": str(output_path)}
 
 
 @router.post("/reload")
 def reload():
-    """Re-load raw graph and re-apply all recorded operations."""
+    """
+    Re-load raw graph and re-apply all recorded operations. Ids created by
+    curation derive from each operation's position in the log, so they come
+    back the same; the change feed's history is dropped, so clients behind
+    the current version refetch.
+    """
     state.reload()
-    return {"status": "ok"}
+    return {"status": "ok", "version": state.get_version()}
@@ -1,28 +1,95 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from engine.api import state
+from engine.index.hierarchy import LEVELS
 
 router = APIRouter()
 
 
 @router.get("/graph")
 def get_graph():
-    return state.get_graph().to_dict()
+    with state.reading() as g:
+        return g.to_dict()
 
 
 @router.get("/scenes")
 def get_scenes():
-    g = state.get_graph()
-    scenes = sorted(
-        g.get_nodes_by_label("Scene"),
-        key=lambda n: n.properties.get("index", 0)
-    )
-    result = []
-    for scene in scenes:
-        shot_edges = [e for e in g.get_edges_from(scene.id) if e.type == "CONTAINS"]
-        result.append({
-            "id": scene.id,
-            "index": scene.properties.get("index"),
-            "heading": scene.properties.get("heading"),
-            "shot_count": len(shot_edges),
-        })
+    with state.reading():
+        return state.get_scene_summaries()
+
+
+@router.get("/nodes/{node_id}/subtree")
+def get_subtree(node_id: str, depth: int = Query(4, ge=0), include_terms: bool = False):
+    """
+    A node with its descendants down to depth levels, as nested JSON:
+    each node dict gains "children" (in index order) while depth remains.
+    With include_terms, sentences also list their term occurrences in order.
+    Cost is proportional to the size of the returned subtree.
+    """
+    with state.reading() as g:
+        node = g.nodes.get(node_id)
+        if node is None:
+            raise HTTPException(status_code=404, detail=f"No node {node_id}")
+        return _subtree(g, node, depth, include_terms)
+
+
+@router.get("/sequence/{level}")
+def get_sequence(level: str, start: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=1000)):
+    """A slice of one level's nodes in reading order, e.g. a timeline window."""
+    label = level.capitalize()
+    if label not in LEVELS:
+        raise HTTPException(status_code=404, detail=f"Unknown level {level!r}")
+    with state.reading() as g:
+        order = state.get_order()
+        return {
+            "level": level,
+            "total": order.level_size(label),
+            "start": start,
+            "nodes": [g.nodes[i].to_dict() for i in order.slice(label, start, start + limit)],
+        }
+
+
+@router.get("/nodes/{node_id}/context")
+def get_context(node_id: str, before: int = Query(2, ge=0, le=1000),
+                after: int = Query(2, ge=0, le=1000)):
+    """A node with up to before/after neighbours on its level, in reading order."""
+    with state.reading() as g:
+        order = state.get_order()
+        if order.ordinal(node_id) is None:
+            raise HTTPException(status_code=404, detail=f"No ordered node {node_id}")
+        preceding, following = order.around(node_id, before, after)
+        return {
+            "ordinal": order.ordinal(node_id),
+            "before": [g.nodes[i].to_dict() for i in preceding],
+            "node": g.nodes[node_id].to_dict(),
+            "after": [g.nodes[i].to_dict() for i in following],
+        }
+
+
+@router.get("/between")
+def get_between(first: str, last: str):
+    """Every node from first to last inclusive, both on the same level, in reading order."""
+    with state.reading() as g:
+        order = state.get_order()
+        for node_id in (first, last):
+            if order.ordinal(node_id) is None:
+                raise HTTPException(status_code=404, detail=f"No ordered node {node_id}")
+        try:
+            ids = order.between(first, last)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return [g.nodes[i].to_dict() for i in ids]
+
+
+def _subtree(g, node, depth: int, include_terms: bool) -> dict:
+    result = node.to_dict()
+    if depth > 0:
+        # From the CONTAINS edges rather than by index: Corpus -> Volume has none
+        result["children"] = [_subtree(g, g.nodes[child_id], depth - 1, include_terms)
+                              for child_id in state.get_hierarchy().children(g, node.id)]
+    if include_terms and "Sentence" in node.labels:
+        edges = [e for e in g.get_edges_from(node.id, "CONTAINS") if "position" in e.properties]
+        result["terms"] = [
+            {"id": e.to_id, "text": g.nodes[e.to_id].properties.get("text"), **e.properties}
+            for e in sorted(edges, key=lambda e: e.properties["position"])
+        ]
     return result
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from engine.api import state
+
+router = APIRouter()
+
+FUZZY_TERMS = 20    # terms a word may expand to in a fuzzy search
+
+
+@router.get("/search")
+def search(q: str, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500),
+           fuzzy: bool = False, form: Optional[str] = None):
+    """
+    Sentences matching a query, in reading order. Words and "quoted phrases"
+    combine with AND (implied between terms), OR, NOT and parentheses.
+    With form (a normal form such as "chopped"), each word matches every term
+    with the same form; with fuzzy, also its spelling variants and near typos.
+    Each hit names its paragraph, shot and scene, and the matched positions.
+    """
+    with state.reading() as g:
+        try:
+            matches = state.get_text_index().search(q, _expander(fuzzy, form))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        order = state.get_order()
+        hierarchy = state.get_hierarchy()
+        ranked = sorted(matches, key=lambda s: order.ordinal(s) or 0)
+        hits = []
+        for sentence_id in ranked[offset:offset + limit]:
+            scene_id = hierarchy.enclosing(sentence_id, "Scene")
+            hits.append({
+                "sentence": sentence_id,
+                "text": g.nodes[sentence_id].properties.get("text"),
+                "positions": matches[sentence_id],
+                "paragraph": hierarchy.enclosing(sentence_id, "Paragraph"),
+                "shot": hierarchy.enclosing(sentence_id, "Shot"),
+                "scene": scene_id,
+                "scene_index": g.nodes[scene_id].properties.get("index") if scene_id else None,
+            })
+        return {"query": q, "total": len(matches), "offset": offset, "hits": hits}
+
+
+def _expander(fuzzy: bool, form: Optional[str]):
+    """The search expand function for the options, or None to match words as they are."""
+    if not (fuzzy or form):
+        return None
+    forms, fuzzy_index = state.get_form_index(), state.get_fuzzy_index()
+
+    def expand(word):
+        terms = [word]
+        if form:
+            terms += forms.lookup(word, form)
+        if fuzzy:
+            terms += [text for text, _ in fuzzy_index.closest(word, limit=FUZZY_TERMS)]
+        return terms
+    return expand
@@ -0,0 +1,189 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from engine.api import state
+from engine.index.forms import LAYERS, normal_forms
+
+router = APIRouter()
+
+
+@router.get("/terms/{text}/concordance")
+def get_concordance(text: str, window: int = Query(5, ge=0, le=50),
+                    offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """
+    Keyword-in-context lines for a term, in reading order: up to window raw
+    tokens either side, running on into neighbouring sentences. Hits come
+    from the positional postings, so only the sentences on the requested
+    page are read from the graph.
+    """
+    with state.reading() as g:
+        order = state.get_order()
+        hierarchy = state.get_hierarchy()
+        hits = state.get_text_index().occurrences(text)
+        if not hits:
+            raise HTTPException(status_code=404, detail=f"No occurrences of {text!r}")
+        hits.sort(key=lambda hit: (order.ordinal(hit[0]) or 0, hit[1]))
+        tokens = {}  # sentence id -> raw tokens, for the sentences this page touches
+
+        def raw_tokens(sentence_id):
+            if sentence_id not in tokens:
+                edges = [e for e in g.get_edges_from(sentence_id, "CONTAINS")
+                         if "position" in e.properties]
+                edges.sort(key=lambda e: e.properties["position"])
+                tokens[sentence_id] = [e.properties.get("raw", "") for e in edges]
+            return tokens[sentence_id]
+
+        lines = []
+        for sentence_id, position in hits[offset:offset + limit]:
+            sentence = raw_tokens(sentence_id)
+            i = position - 1
+            left = sentence[max(i - window, 0):i]
+            right = sentence[i + 1:i + 1 + window]
+            before, after = order.around(sentence_id, window, window)
+            for other in reversed(before):
+                if len(left) >= window:
+                    break
+                left = raw_tokens(other)[-(window - len(left)):] + left
+            for other in after:
+                if len(right) >= window:
+                    break
+                right = right + raw_tokens(other)[:window - len(right)]
+            scene_id = hierarchy.enclosing(sentence_id, "Scene")
+            lines.append({
+                "sentence": sentence_id,
+                "position": position,
+                "left": " ".join(left),
+                "keyword": sentence[i] if i < len(sentence) else text,
+                "right": " ".join(right),
+                "scene": scene_id,
+                "scene_index": g.nodes[scene_id].properties.get("index") if scene_id else None,
+            })
+        return {"term": text, "total": len(hits), "offset": offset, "window": window,
+                "lines": lines}
+
+
+@router.get("/terms/{text}/collocations")
+def get_collocations(text: str, window: int = Query(4, ge=0, le=10), measure: str = "llr",
+                     limit: int = Query(20, ge=1, le=200), min_count: int = Query(2, ge=1)):
+    """
+    Terms that co-occur with a term within +/-window tokens of the same
+    sentence (window=0: anywhere in the same sentence), ranked by llr
+    (log-likelihood), pmi or t (t-score).
+    """
+    with state.reading():
+        try:
+            collocates = state.get_collocations().top(text, window, measure, limit, min_count)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"term": text, "window": window, "measure": measure, "collocates": collocates}
+
+
+@router.get("/ngrams")
+def get_top_ngrams(n: int = Query(2, ge=2, le=5), limit: int = Query(50, ge=1, le=500),
+                   min_count: int = Query(2, ge=1)):
+    """The most frequent runs of n consecutive terms within a sentence."""
+    with state.reading():
+        return {"n": n, "ngrams": state.get_ngrams().top(n, limit, min_count)}
+
+
+@router.get("/ngrams/{text}")
+def get_ngram(text: str, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """How often a phrase of 2 to 5 words occurs, and where, in reading order."""
+    with state.reading() as g:
+        hierarchy = state.get_hierarchy()
+        try:
+            hits = state.get_ngrams().locations(text.lower().split())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        locations = []
+        for sentence_id, position in hits[offset:offset + limit]:
+            scene_id = hierarchy.enclosing(sentence_id, "Scene")
+            locations.append({
+                "sentence": sentence_id,
+                "position": position,
+                "scene": scene_id,
+                "scene_index": g.nodes[scene_id].properties.get("index") if scene_id else None,
+            })
+        return {"ngram": text, "total": len(hits), "offset": offset, "locations": locations}
+
+
+@router.get("/terms/{text}/variants")
+def get_variants(text: str, limit: int = Query(20, ge=1, le=200),
+                 max_distance: Optional[int] = Query(None, ge=0, le=5)):
+    """
+    Lexicon terms close to text: the same letters and digits once accents,
+    case and punctuation are dropped (distance 0), or within max_distance
+    edits (default: scaled to the length, as in the archive's matcher).
+    Candidates for /curate/merge_terms.
+    """
+    with state.reading():
+        text_index = state.get_text_index()
+        matches = state.get_fuzzy_index().closest(text, limit, max_distance)
+        return {"term": text, "variants": [
+            {"term": term, "distance": distance, "occurrences": len(text_index.occurrences(term))}
+            for term, distance in matches
+        ]}
+
+
+@router.get("/terms/{text}/forms")
+def get_forms(text: str):
+    """
+    Each normal form of text (blanched, chopped, folded, mashed, juiced) and
+    the lexicon terms that share it.
+    """
+    with state.reading():
+        index = state.get_form_index()
+        return {"term": text, "forms": [
+            {"layer": layer, "form": form, "terms": index.lookup(text, layer)}
+            for layer, form in zip(LAYERS, normal_forms(text))
+        ]}
+
+
+LEXICON_SORTS = ("frequency", "scene_frequency", "importance", "first", "last", "text")
+
+
+@router.get("/lexicon")
+def get_lexicon(sort: str = "frequency", descending: bool = True, prefix: Optional[str] = None,
+                offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """
+    Lexicon terms with the statistics ingest stored on them (frequency,
+    scene_frequency, first/last occurrence, pos counts, importance), sorted
+    by one of them; first and last sort by the reading order of their
+    sentence. prefix filters by text.
+
+    The statistics are as of when they were counted, at ingest or the
+    term's last merge_terms, but first/last are reported with the scene
+    the sentence is in now; a sentence since split or merged away keeps
+    its stored scene and sorts before the rest.
+    """
+    if sort not in LEXICON_SORTS:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown sort {sort!r}; use one of {', '.join(LEXICON_SORTS)}")
+
+    with state.reading() as g:
+        order, hierarchy = state.get_order(), state.get_hierarchy()
+
+        def key(term):
+            value = term.properties.get(sort)
+            if sort in ("first", "last"):
+                value = order.ordinal((value or {}).get("sentence"))
+                return -1 if value is None else value
+            return value if value is not None else ("" if sort == "text" else 0)
+
+        def located(location):
+            scene_id = hierarchy.enclosing(location["sentence"], "Scene") if location else None
+            if scene_id is None:
+                return location
+            return dict(location, scene=g.nodes[scene_id].properties.get("index"))
+
+        terms = g.get_nodes_by_label("Term")
+        if prefix:
+            terms = [t for t in terms if t.properties.get("text", "").startswith(prefix.lower())]
+        terms.sort(key=key, reverse=descending)
+        rows = []
+        for term in terms[offset:offset + limit]:
+            row = dict(term.properties, id=term.id)
+            for end in ("first", "last"):
+                if end in row:
+                    row[end] = located(row[end])
+            rows.append(row)
+        return {"total": len(terms), "offset": offset, "sort": sort, "terms": rows}
@@ -4,60 +4,484 @@ In-memory graph state for the API.
 On startup: loads graph.json, then re-applies curation.json if it exists.
 Operations modify the in-memory working graph and append to curation.json.
 The raw graph.json is never modified.
+Each applied transaction is published to the change feed as a versioned delta,
+and applied to the hierarchy and reading-order indexes (engine.index) and
+the read-side projections (engine.api.projections) built on them.
+The full-text index comes from text_index.json next to graph.json when
+ingest wrote one (otherwise it is built from the graph), with the curation
+applied to it as one delta.
+
+curation.json is also the shared operation log between worker processes
+(e.g. gunicorn -w 4), each of which holds its own copy of the graph:
+  - writers take an exclusive file lock, catch up with any operations other
+    workers appended, apply and append their own, and replace the file
+    atomically;
+  - readers notice a changed log with a cheap stat() and replay only the
+    new operations, publishing their deltas to the local change feed.
+Operations create ids derived from their position in the log, so every
+worker that replays the same log holds an identical graph.
+
+Within a process the graph is guarded by a reader-writer lock: handlers read
+through reading(), and every mutation (operations, dry runs, catch-up,
+reload) holds the write lock, so readers never see a half-applied change.
+
+Loading can run in the background (load_in_background) so the server can
+answer health checks at once; until it finishes, graph access raises
+NotReady and get_status() reports progress. If a snapshot of the working
+graph is present and still matches graph.json and a prefix of the log, it
+is loaded instead of graph.json and only the newer operations are replayed.
 """
 
 import json
-import copy
+import os
+import pickle
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:     # Windows: no cross-process locking, single worker only
+    fcntl = None
+
+from engine.api.feed import ChangeFeed
+from engine.api.locking import ReadWriteLock
+from engine.analysis.collocations import Collocations
+from engine.analysis.keyness import DistinctiveTerms
+from engine.analysis.matrices import TermMatrices
+from engine.analysis.network import SpeakerNetwork
+from engine.analysis.ngrams import NgramIndex
+from engine.api.projections import SceneSummaries
+from engine.graph.diff import summarize
 from engine.graph.model import Graph
+from engine.index.forms import FormIndex
+from engine.index.fuzzy import FuzzyIndex
+from engine.index.hierarchy import HierarchyIndex
+from engine.index.order import OrderIndex
+from engine.index.text import TextIndex
 
 _graph = None           # working in-memory graph (post-curation)
 _raw_graph_path = None  # path to graph.json
 _curation_path = None   # path to curation.json
 _operations = []        # list of applied operations (mirrors curation.json)
+_feed = ChangeFeed()    # recent (version, delta) history for /changes
+_hierarchy = HierarchyIndex()  # nested-set numbering of the containment tree
+_order = OrderIndex(_hierarchy)  # per-level reading order
+_text = TextIndex()     # term postings for /search
+_forms = FormIndex()    # terms by each normal form
+_fuzzy = FuzzyIndex()   # typo-tolerant term lookup
+_matrices = TermMatrices(_hierarchy, _order, _text)  # sparse term counts per level
+_distinctive = DistinctiveTerms(_hierarchy, _order, _matrices)  # keyness rankings
+_network = SpeakerNetwork(_hierarchy, _order)  # speaker interaction layer
+_collocations = Collocations(_text, _matrices)  # term pair statistics
+_ngrams = NgramIndex(_order, _matrices)  # recurring phrases, built on first use
+_scenes = SceneSummaries(_hierarchy)  # /scenes projection
+_log_stamp = None       # stat of curation.json when last read or written
+_lock = ReadWriteLock()  # guards _graph and _operations within this process
+_snapshot_path = None   # optional pickle of the working graph
+_snapshot_version = None  # version the snapshot on disk holds, if known
+_ready = threading.Event()
+_status = {"status": "idle", "stage": None, "done": 0, "total": 0, "error": None}
+
 
+class VersionConflict(Exception):
+    """The caller's expected graph version is not the current one."""
 
-def load(graph_path: Path, curation_path: Path):
-    global _graph, _raw_graph_path, _curation_path, _operations
+
+class NotReady(Exception):
+    """The working graph has not finished loading (or failed to load)."""
+
+
+def load(graph_path: Path, curation_path: Path, snapshot_path: Path = None):
+    global _raw_graph_path, _curation_path, _snapshot_path
     _raw_graph_path = graph_path
     _curation_path = curation_path
+    _snapshot_path = snapshot_path
 
-    _graph = Graph.load(str(graph_path))
-
-    if curation_path.exists():
-        with open(curation_path) as f:
-            _operations = json.load(f)
-        from engine.curate.operations import apply_operations
-        apply_operations(_graph, _operations)
-    else:
-        _operations = []
+    with _lock.write(), _file_lock(exclusive=False):
+        stamp = _stat_log()
+        _load_graph(_read_log())
+        _set_log_stamp(stamp)
+    _set_status("ready", stage=None)
+    _ready.set()
 
     print(f"Graph loaded: {len(_graph.nodes)} nodes, {len(_graph.edges)} edges")
     if _operations:
         print(f"Curation applied: {len(_operations)} operations")
 
 
+def load_in_background(graph_path: Path, curation_path: Path,
+                       snapshot_path: Path = None) -> threading.Thread:
+    """
+    Load on a daemon thread and return it. Once loaded, refresh the snapshot
+    if it was missing or behind, so the next start is quicker, then warm the
+    keyness rankings.
+    """
+    def run():
+        try:
+            load(graph_path, curation_path, snapshot_path)
+        except Exception as e:
+            _set_status("error", error=f"{type(e).__name__}: {e}")
+            raise
+        if snapshot_path and _snapshot_version != get_version():
+            save_snapshot()
+        with reading():
+            _distinctive.warm()
+
+    _set_status("loading", stage="starting")
+    thread = threading.Thread(target=run, name="graph-loader", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_status() -> dict:
+    """Loading status: idle, loading, ready or error, with stage and progress."""
+    return dict(_status)
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+@contextmanager
+def reading():
+    """
+    Hold the working graph for reading: caught up with other workers, and
+    with no operation half-applied until the block exits. Build whatever
+    the response needs inside the block.
+    """
+    _require_ready()
+    sync()
+    with _lock.read():
+        yield _graph
+
+
 def get_graph() -> Graph:
+    """The working graph, without holding a lock; prefer reading()."""
+    _require_ready()
+    sync()
     return _graph
 
 
 def get_operations() -> list:
-    return _operations
+    with reading():
+        return list(_operations)
+
+
+def get_feed() -> ChangeFeed:
+    return _feed
+
+
+def get_hierarchy() -> HierarchyIndex:
+    """Ancestor/descendant index of the working graph; use inside reading()."""
+    return _hierarchy
+
+
+def get_order() -> OrderIndex:
+    """Reading-order index of the working graph; use inside reading()."""
+    return _order
+
+
+def get_text_index() -> TextIndex:
+    """Full-text index of the working graph; use inside reading()."""
+    return _text
+
+
+def get_form_index() -> FormIndex:
+    """Terms by normal form; use inside reading()."""
+    return _forms
+
+
+def get_fuzzy_index() -> FuzzyIndex:
+    """Fuzzy term lookup over the lexicon; use inside reading()."""
+    return _fuzzy
+
+
+def get_distinctive_terms() -> DistinctiveTerms:
+    """Per-scene and per-speaker keyness rankings; use inside reading()."""
+    return _distinctive
+
+
+def get_speaker_network() -> SpeakerNetwork:
+    """Speaker interaction network; use inside reading()."""
+    return _network
+
+
+def get_collocations() -> Collocations:
+    """Collocation statistics over the term positions; use inside reading()."""
+    return _collocations
+
+
+def get_ngrams() -> NgramIndex:
+    """N-gram frequencies and locations; use inside reading()."""
+    return _ngrams
 
 
-def add_operation(op: dict):
-    """Record an operation and persist to curation.json."""
-    _operations.append(op)
-    with open(_curation_path, 'w') as f:
-        json.dump(_operations, f, indent=2)
+def get_scene_summaries() -> list:
+    """Scene summaries in order; call inside reading()."""
+    return _scenes.list()
+
+
+def get_version() -> int:
+    """
+    Version of the working graph: the number of recorded operations.
+    Every applied operation advances it by one.
+    """
+    return len(_operations)
+
+
+def sync():
+    """Catch up with operations other workers have appended to curation.json."""
+    if not _ready.is_set() or _stat_log() == _log_stamp:
+        return
+    with _lock.write(), _file_lock(exclusive=False):
+        _catch_up()
+
+
+def apply_operations(ops: list, dry_run: bool = False, expected_version: int = None) -> tuple:
+    """
+    Apply operations to the working graph as one transaction and record them.
+
+    If any operation fails the graph is rolled back to its prior state,
+    nothing is recorded, and the error is re-raised; a ValueError carries
+    the 1-based position of the failing operation in its message.
+    With dry_run the operations are applied, diffed and then rolled back,
+    leaving the graph and curation.json untouched.
+    With expected_version, VersionConflict is raised unless the graph (after
+    catching up with other workers) is still at that version.
+    Returns (version, diff): the graph version after the change and the net
+    diff (see engine.graph.diff.summarize).
+    """
+    _require_ready()
+    with _lock.write(), _file_lock(exclusive=not dry_run):
+        _catch_up()
+        if expected_version is not None and expected_version != get_version():
+            raise VersionConflict(
+                f"Graph is at version {get_version()}, expected {expected_version}"
+            )
+        diff = _transact(ops, start=len(_operations) + 1, dry_run=dry_run)
+        if not dry_run:
+            _publish(diff)
+        return get_version(), diff
 
 
 def save_curated(output_path: Path):
     """Write the current working graph to graph_curated.json."""
-    _graph.save(str(output_path))
+    with reading() as g:
+        g.save(str(output_path))
+
+
+def save_snapshot():
+    """Pickle the working graph so the next load can skip graph.json."""
+    global _snapshot_version
+    if _snapshot_path is None:
+        return
+    with reading() as g:
+        data = {
+            "graph_stamp": _stat(_raw_graph_path),
+            "operations": list(_operations),
+            "graph": g,
+            "text_index": _text,
+        }
+        # Every worker saves after loading; a temp file of its own keeps their writes apart
+        tmp_path = _snapshot_path.with_name(f"{_snapshot_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _snapshot_path)
+        _snapshot_version = len(data["operations"])
 
 
 def reload():
     """Re-load raw graph and re-apply all recorded operations."""
-    load(_raw_graph_path, _curation_path)
+    load(_raw_graph_path, _curation_path, _snapshot_path)
+
+
+# --- internals; callers hold the write lock and the file lock ---
+
+def _require_ready():
+    if not _ready.is_set():
+        raise NotReady(_status["status"])
+
+
+def _set_status(status=None, **fields):
+    if status is not None:
+        _status["status"] = status
+    _status.update(fields)
+
+
+def _load_graph(ops: list):
+    global _graph, _operations, _text
+    from engine.curate.operations import apply_operation
+    graph, base, text = _read_snapshot(ops)
+    if graph is None:
+        _set_status(stage="reading graph")
+        graph = Graph.load(str(_raw_graph_path))
+        text = _read_text_index(graph)
+    _set_status(stage="applying curation", done=base, total=len(ops))
+    # With a saved text index, journal the replay so it can be applied as a delta
+    journal = text is not None and base < len(ops)
+    if journal:
+        graph.begin()
+    for seq, op in enumerate(ops[base:], start=base + 1):
+        apply_operation(graph, op, seq)
+        _status["done"] = seq
+    if journal:
+        text.apply(graph, summarize(graph.commit()))
+    _set_status(stage="indexing")
+    if text is None:
+        text = TextIndex()
+        text.rebuild(graph)
+    _graph = graph
+    _operations = list(ops)
+    _text = text
+    _hierarchy.rebuild(_graph)
+    _order.rebuild(_graph)
+    _forms.rebuild(_graph)
+    _fuzzy.rebuild(_graph)
+    _matrices.rebuild(_graph, _text)
+    _distinctive.rebuild(_graph)
+    _network.rebuild(_graph)
+    _collocations.rebuild(_graph, _text)
+    _scenes.rebuild(_graph)
+    _feed.reset(get_version())
+
+
+def _read_snapshot(ops: list):
+    """
+    (graph, operations it includes, text index) from a usable snapshot,
+    else (None, 0, None).
+    """
+    global _snapshot_version
+    if _snapshot_path is None or not _snapshot_path.exists():
+        return None, 0, None
+    _set_status(stage="reading snapshot")
+    try:
+        with open(_snapshot_path, 'rb') as f:
+            data = pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {_snapshot_path}: {e}")
+        return None, 0, None
+    done = data["operations"]
+    if data["graph_stamp"] != _stat(_raw_graph_path) or ops[:len(done)] != done:
+        print(f"Ignoring stale snapshot {_snapshot_path}")
+        return None, 0, None
+    _snapshot_version = len(done)
+    return data["graph"], len(done), data.get("text_index")
+
+
+def _read_text_index(graph: Graph):
+    """The text index ingest saved beside graph.json, if it matches graph."""
+    path = _raw_graph_path.with_name("text_index.json")
+    if not path.exists():
+        return None
+    _set_status(stage="reading text index")
+    text = TextIndex.load(path, graph)
+    if text is None:
+        print(f"Ignoring stale text index {path}")
+    return text
+
+
+def _catch_up():
+    """Replay operations appended to the log since we last read it."""
+    stamp = _stat_log()
+    if stamp == _log_stamp:
+        return
+    ops = _read_log()
+    if ops[:len(_operations)] != _operations:
+        # The log was rewritten rather than appended to: start over
+        _load_graph(ops)
+    else:
+        for seq, op in enumerate(ops[len(_operations):], start=len(_operations) + 1):
+            diff = _transact([op], start=seq, persist=False)
+            _publish(diff)
+    _set_log_stamp(stamp)
+
+
+def _publish(diff: dict):
+    """Bring the indexes up to date with a committed change, then announce it."""
+    _hierarchy.apply(_graph, diff)
+    _order.apply(_graph, diff)
+    _text.apply(_graph, diff)
+    _forms.apply(_graph, diff)
+    _fuzzy.apply(_graph, diff)
+    _matrices.apply(_graph, diff)
+    _distinctive.apply(_graph, diff)
+    _network.apply(_graph, diff)
+    _collocations.apply(_graph, diff)
+    _scenes.apply(_graph, diff)
+    _feed.publish(get_version(), diff)
+
+
+def _transact(ops: list, start: int, dry_run: bool = False, persist: bool = True) -> dict:
+    """Apply ops as one graph transaction, recording and persisting them."""
+    from engine.curate.operations import apply_operation
+    _graph.begin()
+    try:
+        for position, op in enumerate(ops, start=1):
+            try:
+                apply_operation(_graph, op, seq=start + position - 1)
+            except ValueError as e:
+                if len(ops) > 1:
+                    raise ValueError(f"Operation {position} ({op['op']}): {e}") from e
+                raise
+        diff = summarize(_graph.journal)
+        if dry_run:
+            _graph.rollback()
+            return diff
+        if persist:
+            _write_log(_operations + ops)
+    except Exception:
+        if _graph.journal is not None:
+            _graph.rollback()
+        raise
+    _graph.commit()
+    _operations.extend(ops)
+    return diff
+
+
+def _read_log() -> list:
+    if not _curation_path.exists():
+        return []
+    with open(_curation_path) as f:
+        return json.load(f)
+
+
+def _write_log(ops: list):
+    """Replace curation.json atomically, so readers never see a partial file."""
+    tmp_path = _curation_path.with_name(_curation_path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(ops, f, indent=2)
+    os.replace(tmp_path, _curation_path)
+    _set_log_stamp(_stat_log())
+
+
+def _stat_log():
+    return _stat(_curation_path)
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _set_log_stamp(stamp):
+    global _log_stamp
+    _log_stamp = stamp
+
+
+@contextmanager
+def _file_lock(exclusive: bool):
+    """Lock curation.json across processes via a sidecar .lock file."""
+    if fcntl is None:
+        yield
+        return
+    lock_path = _curation_path.with_name(_curation_path.name + ".lock")
+    with open(lock_path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
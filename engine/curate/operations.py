@@ -1,196 +1,234 @@
 """
-Graph curation operations: merge, split, rename.
+Graph curation operations: merge, split, rename, and merge_terms.
 
-All operations work on a Graph instance in place.
-After structural changes, affected levels are renumbered sequentially.
+All operations work on a Graph instance in place, mutating it only through
+Graph methods so the changes can be journaled and rolled back.
+After structural changes, the affected siblings are renumbered sequentially
+under their parent, keeping node and CONTAINS edge indexes in step.
+
+Nodes are addressed by hierarchical path: the indices of their ancestors
+below the volume, then their own index among their siblings. Index values
+are only unique within a parent, so e.g. paragraph 5 of scene 12 / shot 3 is
+level "paragraph", parent [12, 3], index 5. Scenes have parent [].
+Paths resolve through Graph.get_child in O(depth).
+
+At the lowest level (sentence) the "children" are the Term occurrence edges
+of the lexicon, ordered by their 'position' rather than by an index.
+
+merge_terms works on the lexicon instead of the hierarchy: Terms are
+addressed by their text, and spelling variants are folded into one Term.
 """
 
+from engine.analysis.importance import term_importance
 from engine.graph.model import Graph
 
 HIERARCHY = ["corpus", "volume", "scene", "shot", "paragraph", "sentence"]
 
+# Paths start below this level, which has a single node in a corpus
+PATH_ROOT = "volume"
+
 
 def child_label(level: str) -> str:
     idx = HIERARCHY.index(level.lower())
     return HIERARCHY[idx + 1].capitalize() if idx + 1 < len(HIERARCHY) else None
 
 
-def get_nodes_by_level(g: Graph, level: str) -> dict:
-    """Return {index: node} for all nodes at the given level."""
-    return {
-        n.properties.get("index"): n
-        for n in g.get_nodes_by_label(level.capitalize())
-    }
-
-
-def renumber_level(g: Graph, level: str):
-    """Renumber all nodes at a level sequentially by current index."""
-    nodes = sorted(
-        g.get_nodes_by_label(level.capitalize()),
-        key=lambda n: n.properties.get("index", 0)
-    )
-    for i, node in enumerate(nodes, start=1):
-        node.properties["index"] = i
-
-
-def rename_node(g: Graph, level: str, index: int, heading: str):
-    nodes = get_nodes_by_level(g, level)
-    if index not in nodes:
-        raise ValueError(f"No {level} with index {index}")
-    nodes[index].properties["heading"] = heading
+def resolve_path(g: Graph, path: list):
+    """
+    Return the node at the given path, in O(depth).
+    An empty path resolves to the root (volume) node.
+    """
+    roots = g.get_nodes_by_label(PATH_ROOT.capitalize())
+    if len(roots) != 1:
+        raise ValueError(f"Expected one {PATH_ROOT}, found {len(roots)}")
+    node = roots[0]
+    first = HIERARCHY.index(PATH_ROOT) + 1
+    for depth, index in enumerate(path):
+        if first + depth >= len(HIERARCHY):
+            raise ValueError(f"Path {list(path)} is deeper than the hierarchy")
+        child = g.get_child(node.id, index)
+        if child is None:
+            level = HIERARCHY[first + depth]
+            raise ValueError(f"No {level} at path {list(path[:depth + 1])}")
+        node = child
+    return node
+
+
+def resolve_parent(g: Graph, level: str, parent: list):
+    """Resolve the parent path of nodes at the given level, checking its depth."""
+    level = level.lower()
+    if level not in HIERARCHY or HIERARCHY.index(level) <= HIERARCHY.index(PATH_ROOT):
+        raise ValueError(f"Cannot curate level {level!r}")
+    depth = HIERARCHY.index(level) - HIERARCHY.index(PATH_ROOT) - 1
+    if len(parent) != depth:
+        raise ValueError(
+            f"A {level} needs a parent path of {depth} indices, got {list(parent)}"
+        )
+    return resolve_path(g, parent)
 
 
-def merge_nodes(g: Graph, level: str, indices: list, heading: str):
+def renumber_children(g: Graph, parent_id: str, from_index=1):
+    """
+    Renumber the children of parent_id sequentially, starting with the first
+    child whose index is >= from_index. Children before that are assumed to
+    be numbered 1..from_index-1 already and are left alone.
+    Both the child's 'index' and its CONTAINS edge 'index' are updated, and
+    only when they actually change.
     """
-    Merge N nodes at the given level into one.
+    affected = []
+    for edge in g.get_edges_from(parent_id, "CONTAINS"):
+        child = g.nodes.get(edge.to_id)
+        if child is not None:
+            current = child.properties.get("index", 0)
+            if current >= from_index:
+                affected.append((current, edge, child))
+    affected.sort(key=lambda t: t[0])
+    for i, (current, edge, child) in enumerate(affected, start=from_index):
+        if current != i:
+            g.set_property(child, "index", i)
+        if edge.properties.get("index") != i:
+            g.set_property(edge, "index", i)
+
+
+def rename_node(g: Graph, level: str, index: int, heading: str, parent=()):
+    node = _get_node(g, level, parent, index)
+    g.set_property(node, "heading", heading)
+
+
+def merge_nodes(g: Graph, level: str, indices: list, heading: str = None, parent=()):
+    """
+    Merge N consecutive sibling nodes at the given level into one.
     All children are re-parented to the new node in narrative order.
     PRECEDES edges are updated at both the merged level and child level.
     """
     label = level.capitalize()
-    nodes_map = get_nodes_by_level(g, level)
-    nodes_to_merge = [nodes_map[i] for i in sorted(indices) if i in nodes_map]
-
-    if len(nodes_to_merge) < 2:
-        raise ValueError(f"Need at least 2 nodes to merge, got {len(nodes_to_merge)}")
+    parent_node = resolve_parent(g, level, parent)
+    indices = sorted(set(indices))
+    if len(indices) < 2:
+        raise ValueError(f"Need at least 2 nodes to merge, got {len(indices)}")
+    if indices[-1] - indices[0] != len(indices) - 1:
+        raise ValueError(f"Can only merge consecutive siblings, got indices {indices}")
+    nodes_to_merge = []
+    for i in indices:
+        node = g.get_child(parent_node.id, i)
+        if node is None:
+            raise ValueError(f"No {level} at path {list(parent) + [i]}")
+        nodes_to_merge.append(node)
 
     first = nodes_to_merge[0]
-
-    # Create merged node, preserving original parse indices for traceability
-    merged = g.create_node([label], {
-        "heading": heading,
-        "index": first.properties.get("index"),
-        "parse_indices": [n.properties.get("index") for n in nodes_to_merge]
-    })
+    last = nodes_to_merge[-1]
+    leaf = _is_leaf(level)
+    key = _child_key(level)
+
+    # Look up the surrounding structure before anything is detached
+    pred = _get_precedes_to(g, first.id)
+    succ = _get_precedes_from(g, last.id)
+
+    # Create merged node, preserving original parse indices for traceability.
+    # Other properties (paragraph type, speaker, ...) carry over from the first.
+    props = dict(first.properties)
+    props["index"] = first.properties.get("index")
+    props["parse_indices"] = [n.properties.get("index") for n in nodes_to_merge]
+    if heading is not None:
+        props["heading"] = heading
+    if "text" in props:
+        props["text"] = " ".join(n.properties.get("text", "") for n in nodes_to_merge)
+    merged = g.create_node([label], props)
 
     # Re-parent all children in order, renumbering
     child_index = 1
     prev_child = None
 
-    for parent in nodes_to_merge:
-        children = _get_ordered_children(g, parent.id)
-        for child in children:
-            # Remove old CONTAINS edge
-            g.edges = [e for e in g.edges
-                       if not (e.type == "CONTAINS"
-                               and e.from_id == parent.id
-                               and e.to_id == child.id)]
-            # Add new CONTAINS edge
-            g.create_edge("CONTAINS", merged.id, child.id, {"index": child_index})
-            child.properties["index"] = child_index
+    for node in nodes_to_merge:
+        for edge in _get_child_edges(g, node.id, key):
+            child = g.nodes[edge.to_id]
+            g.remove_edge(edge)
+            g.create_edge("CONTAINS", merged.id, child.id,
+                          dict(edge.properties, **{key: child_index}))
+            if not leaf:
+                g.set_property(child, "index", child_index)
+
+                # Stitch PRECEDES across the old boundary
+                if prev_child:
+                    if not _precedes_exists(g, prev_child.id, child.id):
+                        g.create_edge("PRECEDES", prev_child.id, child.id)
+                prev_child = child
             child_index += 1
 
-            # Stitch PRECEDES across the old scene boundary
-            if prev_child:
-                if not _precedes_exists(g, prev_child.id, child.id):
-                    g.create_edge("PRECEDES", prev_child.id, child.id)
-            prev_child = child
-
-    # Re-parent merged node to the parent of the first merged node
-    parent_edge = next(
-        (e for e in g.edges if e.type == "CONTAINS" and e.to_id == first.id), None
-    )
-    if parent_edge:
-        parent_id = parent_edge.from_id
-        # Remove all CONTAINS edges from parent to merged nodes
-        merged_ids = {n.id for n in nodes_to_merge}
-        g.edges = [e for e in g.edges
-                   if not (e.type == "CONTAINS"
-                           and e.from_id == parent_id
-                           and e.to_id in merged_ids)]
-        g.create_edge("CONTAINS", parent_id, merged.id,
-                      {"index": merged.properties["index"]})
-
-    # Update PRECEDES at this level
-    merged_ids = {n.id for n in nodes_to_merge}
-    pred = next((e for e in g.edges
-                 if e.type == "PRECEDES" and e.to_id == first.id), None)
-    succ = next((e for e in g.edges
-                 if e.type == "PRECEDES" and e.from_id == nodes_to_merge[-1].id), None)
+    g.create_edge("CONTAINS", parent_node.id, merged.id,
+                  {"index": merged.properties["index"]})
 
-    g.edges = [e for e in g.edges
-               if not (e.type == "PRECEDES"
-                       and (e.from_id in merged_ids or e.to_id in merged_ids))]
+    # Remove merged nodes; this drops their CONTAINS and PRECEDES edges too
+    for node in nodes_to_merge:
+        g.remove_node(node.id)
 
+    # Update PRECEDES at this level
     if pred:
         g.create_edge("PRECEDES", pred.from_id, merged.id)
     if succ:
         g.create_edge("PRECEDES", merged.id, succ.to_id)
 
-    # Remove merged nodes
-    for node in nodes_to_merge:
-        del g.nodes[node.id]
-
-    renumber_level(g, level)
+    renumber_children(g, parent_node.id, merged.properties["index"])
 
 
 def split_node(g: Graph, level: str, index: int, at_child_index: int,
-               heading_before: str = None, heading_after: str = None):
+               heading_before: str = None, heading_after: str = None, parent=()):
     """
     Split a node at at_child_index.
     Children [0, at_child_index) go to the first half.
     Children [at_child_index, end) go to the second half.
+    At sentence level the children are term positions.
     """
     label = level.capitalize()
-    nodes_map = get_nodes_by_level(g, level)
-    if index not in nodes_map:
-        raise ValueError(f"No {level} with index {index}")
-    node = nodes_map[index]
-
-    children = _get_ordered_children(g, node.id)
-    if at_child_index < 1 or at_child_index >= len(children):
+    parent_node = resolve_parent(g, level, parent)
+    node = g.get_child(parent_node.id, index)
+    if node is None:
+        raise ValueError(f"No {level} at path {list(parent) + [index]}")
+    leaf = _is_leaf(level)
+    key = _child_key(level)
+
+    child_edges = _get_child_edges(g, node.id, key)
+    if at_child_index < 1 or at_child_index >= len(child_edges):
         raise ValueError(
-            f"at_child_index {at_child_index} out of range (1..{len(children)-1})"
+            f"at_child_index {at_child_index} out of range (1..{len(child_edges)-1})"
         )
 
-    before = children[:at_child_index]
-    after = children[at_child_index:]
-    heading = node.properties.get("heading", "")
-
-    node_before = g.create_node([label], {
-        "heading": heading_before or heading,
-        "index": index,
-        "parse_indices": [index]
-    })
-    node_after = g.create_node([label], {
-        "heading": heading_after or heading + " (cont.)",
-        "index": index + 0.5,  # temporary; renumbered below
-        "parse_indices": [index]
-    })
-
-    # Remove all old CONTAINS edges from node
-    g.edges = [e for e in g.edges
-               if not (e.type == "CONTAINS" and e.from_id == node.id)]
-
-    # Assign children
-    for i, child in enumerate(before, start=1):
-        g.create_edge("CONTAINS", node_before.id, child.id, {"index": i})
-        child.properties["index"] = i
-    for i, child in enumerate(after, start=1):
-        g.create_edge("CONTAINS", node_after.id, child.id, {"index": i})
-        child.properties["index"] = i
+    before = child_edges[:at_child_index]
+    after = child_edges[at_child_index:]
+
+    # Look up the surrounding structure before anything is detached
+    pred = _get_precedes_to(g, node.id)
+    succ = _get_precedes_from(g, node.id)
+
+    props_before = dict(node.properties, index=index, parse_indices=[index])
+    props_after = dict(node.properties, index=index + 0.5,  # temporary; renumbered below
+                       parse_indices=[index])
+    if "heading" in node.properties or heading_before or heading_after:
+        heading = node.properties.get("heading", "")
+        props_before["heading"] = heading_before or heading
+        props_after["heading"] = heading_after or heading + " (cont.)"
+    if "text" in node.properties:
+        props_before["text"], props_after["text"] = _split_text(g, node, before, after, leaf)
+    node_before = g.create_node([label], props_before)
+    node_after = g.create_node([label], props_after)
+
+    # Move children across, removing the old CONTAINS edges from node
+    for new_parent, edges in ((node_before, before), (node_after, after)):
+        for i, edge in enumerate(edges, start=1):
+            g.remove_edge(edge)
+            g.create_edge("CONTAINS", new_parent.id, edge.to_id,
+                          dict(edge.properties, **{key: i}))
+            if not leaf:
+                g.set_property(g.nodes[edge.to_id], "index", i)
 
     # Re-parent in parent node
-    parent_edge = next(
-        (e for e in g.edges if e.type == "CONTAINS" and e.to_id == node.id), None
-    )
-    if parent_edge:
-        parent_id = parent_edge.from_id
-        g.edges = [e for e in g.edges
-                   if not (e.type == "CONTAINS"
-                           and e.from_id == parent_id
-                           and e.to_id == node.id)]
-        g.create_edge("CONTAINS", parent_id, node_before.id, {"index": index})
-        g.create_edge("CONTAINS", parent_id, node_after.id, {"index": index + 0.5})
+    g.create_edge("CONTAINS", parent_node.id, node_before.id, {"index": index})
+    g.create_edge("CONTAINS", parent_node.id, node_after.id, {"index": index + 0.5})
 
-    # Update PRECEDES at this level
-    pred = next((e for e in g.edges
-                 if e.type == "PRECEDES" and e.to_id == node.id), None)
-    succ = next((e for e in g.edges
-                 if e.type == "PRECEDES" and e.from_id == node.id), None)
-    g.edges = [e for e in g.edges
-               if not (e.type == "PRECEDES"
-                       and (e.from_id == node.id or e.to_id == node.id))]
+    # Remove the split node; this drops its remaining CONTAINS and PRECEDES edges
+    g.remove_node(node.id)
 
+    # Update PRECEDES at this level
     if pred:
         g.create_edge("PRECEDES", pred.from_id, node_before.id)
     g.create_edge("PRECEDES", node_before.id, node_after.id)
@@ -198,34 +236,178 @@ def split_node(g: Graph, level: str, index: int, at_child_index: int,
         g.create_edge("PRECEDES", node_after.id, succ.to_id)
 
     # Stitch PRECEDES at child level across the split boundary
-    if before and after:
-        if not _precedes_exists(g, before[-1].id, after[0].id):
-            g.create_edge("PRECEDES", before[-1].id, after[0].id)
+    if not leaf:
+        last_before, first_after = before[-1].to_id, after[0].to_id
+        if not _precedes_exists(g, last_before, first_after):
+            g.create_edge("PRECEDES", last_before, first_after)
 
-    del g.nodes[node.id]
-    renumber_level(g, level)
+    renumber_children(g, parent_node.id, index)
 
 
-def apply_operations(g: Graph, ops: list):
-    """Re-apply a list of operations to a graph (used on reload)."""
-    for op in ops:
+def merge_terms(g: Graph, terms: list, into: str):
+    """
+    Fold the Terms with the given texts into the Term whose text is into:
+    their occurrences (position, pos and raw form kept) move over and the
+    variant Terms are removed. If the Terms carry ingest statistics, the
+    merged Term's are recounted from its occurrences, in the working graph's
+    scene numbering, and every Term's importance is reweighed, since it is
+    scaled by the range of all frequencies.
+    """
+    by_text = {t.properties.get("text"): t for t in g.get_nodes_by_label("Term")}
+    target = by_text.get(into)
+    if target is None:
+        raise ValueError(f"No term {into!r}")
+    variants = [by_text[text] for text in dict.fromkeys(terms) if text != into and text in by_text]
+    if not variants:
+        raise ValueError(f"No terms to merge into {into!r}")
+
+    for term in variants:
+        for edge in g.get_edges_to(term.id, "CONTAINS"):
+            if "position" in edge.properties:
+                g.create_edge("CONTAINS", edge.from_id, target.id, dict(edge.properties))
+        # This drops the occurrences and the lexicon's edge to the term
+        g.remove_node(term.id)
+
+    if "frequency" in target.properties:
+        for key, stat in _term_statistics(g, target.id).items():
+            g.set_property(target, key, stat)
+    if "importance" in target.properties:
+        weighed = [t for t in g.get_nodes_by_label("Term") if "frequency" in t.properties]
+        importance = term_importance([t.properties["frequency"] for t in weighed])
+        for term, value in zip(weighed, importance):
+            value = round(float(value), 6)
+            if term.properties.get("importance") != value:
+                g.set_property(term, "importance", value)
+
+    for lexicon in g.get_nodes_by_label("Lexicon"):
+        if "term_count" in lexicon.properties:
+            g.set_property(lexicon, "term_count", len(g.get_nodes_by_label("Term")))
+
+
+def apply_operation(g: Graph, op: dict, seq: int = None):
+    """
+    Apply a single recorded operation to a graph.
+    seq is the operation's 1-based position in the curation log; when given,
+    the nodes and edges it creates get ids derived from it, so replaying the
+    log always reproduces the same ids.
+    """
+    parent = op.get("parent") or []
+    if seq is not None:
+        g.seed_ids(f"op:{seq}")
+    try:
         if op["op"] == "merge":
-            merge_nodes(g, op["level"], op["indices"], op["heading"])
+            merge_nodes(g, op["level"], op["indices"], op.get("heading"), parent)
         elif op["op"] == "split":
             split_node(g, op["level"], op["index"], op["at_child_index"],
-                       op.get("heading_before"), op.get("heading_after"))
+                       op.get("heading_before"), op.get("heading_after"), parent)
         elif op["op"] == "rename":
-            rename_node(g, op["level"], op["index"], op["heading"])
+            rename_node(g, op["level"], op["index"], op["heading"], parent)
+        elif op["op"] == "merge_terms":
+            merge_terms(g, op["terms"], op["into"])
+        else:
+            raise ValueError(f"Unknown operation {op['op']!r}")
+    finally:
+        if seq is not None:
+            g.seed_ids(None)
+
+
+def apply_operations(g: Graph, ops: list, start: int):
+    """
+    Re-apply a list of operations to a graph (used on reload). start is the
+    log position of the first one, which seeds the ids it creates; a graph
+    that already has operations applied must continue from the next position.
+    """
+    for seq, op in enumerate(ops, start=start):
+        apply_operation(g, op, seq)
 
 
 # --- helpers ---
+#
+# All lookups go through the graph's adjacency indexes, so each costs
+# O(degree of the node) rather than a scan of every edge.
+
+def _get_node(g: Graph, level: str, parent, index):
+    node = g.get_child(resolve_parent(g, level, parent).id, index)
+    if node is None:
+        raise ValueError(f"No {level} at path {list(parent) + [index]}")
+    return node
+
+
+def _is_leaf(level: str) -> bool:
+    return level.lower() == HIERARCHY[-1]
+
+
+def _child_key(level: str) -> str:
+    """Edge property that orders a node's children: term 'position' at the leaf level."""
+    return "position" if _is_leaf(level) else "index"
+
+
+def _get_child_edges(g: Graph, parent_id: str, key: str = "index") -> list:
+    """CONTAINS edges from parent_id to its children, ordered by the key property."""
+    edges = [e for e in g.get_edges_from(parent_id, "CONTAINS")
+             if e.to_id in g.nodes and key in e.properties]
+    return sorted(edges, key=lambda e: e.properties[key])
+
+
+def _term_statistics(g: Graph, term_id: str) -> dict:
+    """A Term's ingest statistics (see engine.ingest.ingest), recounted from its occurrences."""
+    occurrences = []
+    pos = {}
+    for edge in g.get_edges_to(term_id, "CONTAINS"):
+        if "position" not in edge.properties:
+            continue
+        # Path of indices from the scene down to the position, for reading order
+        path, node_id = [edge.properties["position"]], edge.from_id
+        while "Scene" not in g.nodes[node_id].labels:
+            parent = next(e for e in g.get_edges_to(node_id, "CONTAINS") if "index" in e.properties)
+            path.append(parent.properties["index"])
+            node_id = parent.from_id
+        scene_index = g.nodes[node_id].properties.get("index")
+        occurrences.append(([scene_index] + path[::-1], edge.from_id))
+        tag = edge.properties.get("pos")
+        pos[tag] = pos.get(tag, 0) + 1
+    if not occurrences:
+        return {"frequency": 0, "scene_frequency": 0, "first": None, "last": None, "pos": {}}
+    occurrences.sort(key=lambda occurrence: occurrence[0])
+    (first_path, first_sentence), (last_path, last_sentence) = occurrences[0], occurrences[-1]
+    return {
+        "frequency": len(occurrences),
+        "scene_frequency": len({path[0] for path, _ in occurrences}),
+        "first": {"scene": first_path[0], "sentence": first_sentence},
+        "last": {"scene": last_path[0], "sentence": last_sentence},
+        "pos": pos,
+    }
+
 
 def _get_ordered_children(g: Graph, parent_id: str) -> list:
-    edges = [e for e in g.edges if e.type == "CONTAINS" and e.from_id == parent_id]
-    children = [g.nodes[e.to_id] for e in edges if e.to_id in g.nodes]
-    return sorted(children, key=lambda n: n.properties.get("index", 0))
+    return [g.nodes[e.to_id] for e in _get_child_edges(g, parent_id)]
+
+
+def _split_text(g: Graph, node, before: list, after: list, leaf: bool):
+    """Divide a node's text between the two halves of a split."""
+    text = node.properties.get("text", "")
+    if not leaf:
+        def joined(edges):
+            return " ".join(g.nodes[e.to_id].properties.get("text", "") for e in edges)
+        return joined(before), joined(after)
+    # Sentence: walk the raw tokens through the text to find the split offset
+    offset = 0
+    for edge in before:
+        found = text.find(edge.properties.get("raw", ""), offset)
+        if found >= 0:
+            offset = found + len(edge.properties.get("raw", ""))
+    start = text.find(after[0].properties.get("raw", ""), offset)
+    cut = start if start >= 0 else offset
+    return text[:cut].strip(), text[cut:].strip()
+
+
+def _get_precedes_to(g: Graph, node_id: str):
+    return next(iter(g.get_edges_to(node_id, "PRECEDES")), None)
+
+
+def _get_precedes_from(g: Graph, node_id: str):
+    return next(iter(g.get_edges_from(node_id, "PRECEDES")), None)
 
 
 def _precedes_exists(g: Graph, from_id: str, to_id: str) -> bool:
-    return any(e for e in g.edges
-               if e.type == "PRECEDES" and e.from_id == from_id and e.to_id == to_id)
+    return any(e.to_id == to_id for e in g.get_edges_from(from_id, "PRECEDES"))
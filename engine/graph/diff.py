@@ -0,0 +1,71 @@
+"""
+Summarize a transaction journal (see Graph.begin/commit) as a net diff.
+
+Intermediate states are collapsed: a node created and deleted within the
+same transaction does not appear, and an updated item reports only the final
+values of the properties that actually changed.
+
+    {
+        "nodes": {"added": [node dict], "removed": [{"id", "labels"}],
+                  "updated": [{"id", "properties"}]},
+        "edges": {"added": [edge dict], "removed": [{"id", "type", "from", "to"}],
+                  "updated": [{"id", "properties"}]}
+    }
+
+Removed items carry just enough for a client to patch its local copy.
+"""
+
+from engine.graph.model import Node, _MISSING
+
+
+def summarize(journal: list) -> dict:
+    added = {}       # id -> Node/Edge created in this transaction
+    removed = {}     # id -> pre-existing Node/Edge deleted in this transaction
+    original = {}    # id -> (item, {key: value before the first change})
+
+    for kind, item, *args in journal:
+        if kind in ("add_node", "add_edge"):
+            if item.id in removed:
+                # Deleted then restored: treat as an update of the original
+                del removed[item.id]
+            else:
+                added[item.id] = item
+        elif kind in ("remove_node", "remove_edge"):
+            if item.id in added:
+                del added[item.id]
+            else:
+                removed[item.id] = item
+        elif kind == "set_property":
+            key, old = args
+            _, before = original.setdefault(item.id, (item, {}))
+            before.setdefault(key, old)
+
+    diff = {
+        "nodes": {"added": [], "removed": [], "updated": []},
+        "edges": {"added": [], "removed": [], "updated": []},
+    }
+    for item in added.values():
+        diff[_kind(item)]["added"].append(item.to_dict())
+    for item in removed.values():
+        diff[_kind(item)]["removed"].append(_removed(item))
+    for item_id, (item, before) in original.items():
+        if item_id in added or item_id in removed:
+            continue
+        changed = {
+            key: item.properties.get(key)
+            for key, old in before.items()
+            if old is _MISSING or item.properties.get(key, _MISSING) != old
+        }
+        if changed:
+            diff[_kind(item)]["updated"].append({"id": item_id, "properties": changed})
+    return diff
+
+
+def _removed(item) -> dict:
+    if isinstance(item, Node):
+        return {"id": item.id, "labels": item.labels}
+    return {"id": item.id, "type": item.type, "from": item.from_id, "to": item.to_id}
+
+
+def _kind(item) -> str:
+    return "nodes" if isinstance(item, Node) else "edges"
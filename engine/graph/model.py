@@ -1,6 +1,9 @@
 import json
 import uuid
 
+_MISSING = object()  # journal marker for a property that did not exist
+_ID_NAMESPACE = uuid.UUID("6f1c2a0e-5b7d-4e8a-9c3f-2d4b6a8e0f11")
+
 
 class Node:
     def __init__(self, labels, properties=None, node_id=None):
@@ -12,7 +15,7 @@ class Node:
         return {
             "id": self.id,
             "labels": self.labels,
-            "properties": self.properties
+            "properties": dict(self.properties)
         }
 
 
@@ -30,53 +33,207 @@ class Edge:
             "type": self.type,
             "from": self.from_id,
             "to": self.to_id,
-            "properties": self.properties
+            "properties": dict(self.properties)
         }
 
 
 class Graph:
+    """
+    Property graph with adjacency indexes.
+
+    Edges are kept by id, and indexed by source and target node so that
+    neighbourhood lookups cost O(degree) rather than a scan of every edge.
+    Nodes are indexed by label, and CONTAINS edges that carry an 'index' are
+    indexed by (parent, index) so a child can be found by position in O(1).
+    Always mutate through the add/remove/set methods so the indexes stay in
+    step with the data.
+
+    Between begin() and commit() every mutation is recorded in a journal;
+    rollback() undoes them in reverse, restoring the graph's contents.
+    """
+
     def __init__(self):
-        self.nodes = {}   # id -> Node
-        self.edges = []   # list of Edge
+        self.nodes = {}      # id -> Node
+        self._edges = {}     # id -> Edge, in insertion order
+        self._out = {}       # node id -> {edge id: Edge} for edges leaving it
+        self._in = {}        # node id -> {edge id: Edge} for edges arriving at it
+        self._by_label = {}  # label -> {node id: Node}
+        self._children = {}  # (parent id, index) -> {edge id: Edge} for indexed CONTAINS
+        self._journal = None  # list of mutations while a transaction is open
+        self._id_seed = None  # see seed_ids
+        self._id_count = 0
+
+    @property
+    def edges(self):
+        return self._edges.values()
 
     def add_node(self, node):
+        if node.id in self.nodes:
+            raise ValueError(f"Node {node.id} already exists")
         self.nodes[node.id] = node
+        for label in node.labels:
+            self._by_label.setdefault(label, {})[node.id] = node
+        self._record("add_node", node)
+        return node
+
+    def remove_node(self, node_id):
+        """Remove a node together with every edge that touches it."""
+        for edge in list(self._out.get(node_id, {}).values()):
+            self.remove_edge(edge)
+        for edge in list(self._in.get(node_id, {}).values()):
+            self.remove_edge(edge)
+        self._out.pop(node_id, None)
+        self._in.pop(node_id, None)
+        node = self.nodes.pop(node_id)
+        for label in node.labels:
+            self._by_label.get(label, {}).pop(node_id, None)
+        self._record("remove_node", node)
         return node
 
     def add_edge(self, edge):
-        self.edges.append(edge)
+        if edge.id in self._edges:
+            raise ValueError(f"Edge {edge.id} already exists")
+        self._edges[edge.id] = edge
+        self._out.setdefault(edge.from_id, {})[edge.id] = edge
+        self._in.setdefault(edge.to_id, {})[edge.id] = edge
+        self._index_child(edge)
+        self._record("add_edge", edge)
         return edge
 
+    def remove_edge(self, edge):
+        del self._edges[edge.id]
+        del self._out[edge.from_id][edge.id]
+        del self._in[edge.to_id][edge.id]
+        self._unindex_child(edge)
+        self._record("remove_edge", edge)
+        return edge
+
+    def set_property(self, item, key, value):
+        """Set a property on a Node or Edge, journaling the old value."""
+        if self._journal is not None:
+            old = item.properties.get(key, _MISSING)
+            self._journal.append(("set_property", item, key, old))
+        self._assign(item, key, value)
+
     def create_node(self, labels, properties=None):
-        node = Node(labels, properties)
+        node = Node(labels, properties, self._new_id())
         return self.add_node(node)
 
     def create_edge(self, edge_type, from_id, to_id, properties=None):
-        edge = Edge(edge_type, from_id, to_id, properties)
+        edge = Edge(edge_type, from_id, to_id, properties, self._new_id())
         return self.add_edge(edge)
 
+    def seed_ids(self, seed=None):
+        """
+        Derive the ids of created nodes and edges from seed and a counter
+        until called again with None, so replaying the same mutations with
+        the same seed reproduces the same ids.
+        """
+        self._id_seed = seed
+        self._id_count = 0
+
+    def _new_id(self):
+        if self._id_seed is None:
+            return str(uuid.uuid4())
+        self._id_count += 1
+        return str(uuid.uuid5(_ID_NAMESPACE, f"{self._id_seed}:{self._id_count}"))
+
     def get_nodes_by_label(self, label):
-        return [n for n in self.nodes.values() if label in n.labels]
+        return list(self._by_label.get(label, {}).values())
 
-    def get_edges_by_type(self, edge_type):
-        return [e for e in self.edges if e.type == edge_type]
+    def get_child(self, parent_id, index):
+        """The node that parent_id CONTAINS at the given index, or None."""
+        for edge in self._children.get((parent_id, index), {}).values():
+            return self.nodes.get(edge.to_id)
+        return None
 
-    def get_edges_from(self, node_id):
-        return [e for e in self.edges if e.from_id == node_id]
+    def get_edge(self, edge_id):
+        return self._edges.get(edge_id)
 
-    def get_edges_to(self, node_id):
-        return [e for e in self.edges if e.to_id == node_id]
+    def get_edges_by_type(self, edge_type):
+        return [e for e in self._edges.values() if e.type == edge_type]
+
+    def get_edges_from(self, node_id, edge_type=None):
+        edges = self._out.get(node_id, {}).values()
+        return [e for e in edges if edge_type is None or e.type == edge_type]
+
+    def get_edges_to(self, node_id, edge_type=None):
+        edges = self._in.get(node_id, {}).values()
+        return [e for e in edges if edge_type is None or e.type == edge_type]
+
+    # --- transactions ---
+
+    def begin(self):
+        if self._journal is not None:
+            raise RuntimeError("Transaction already open")
+        self._journal = []
+
+    @property
+    def journal(self):
+        """Mutations recorded so far in the open transaction, or None."""
+        return self._journal
+
+    def commit(self):
+        """Close the transaction and return its journal of mutations."""
+        journal, self._journal = self._journal, None
+        return journal
+
+    def rollback(self):
+        """Undo every mutation since begin(), most recent first."""
+        journal, self._journal = self._journal, None
+        for kind, item, *args in reversed(journal):
+            if kind == "add_node":
+                self.remove_node(item.id)
+            elif kind == "remove_node":
+                self.add_node(item)
+            elif kind == "add_edge":
+                self.remove_edge(item)
+            elif kind == "remove_edge":
+                self.add_edge(item)
+            elif kind == "set_property":
+                key, old = args
+                self._assign(item, key, old)
+
+    # --- index maintenance ---
+
+    def _assign(self, item, key, value):
+        reindex = key == "index" and isinstance(item, Edge)
+        if reindex:
+            self._unindex_child(item)
+        if value is _MISSING:
+            item.properties.pop(key, None)
+        else:
+            item.properties[key] = value
+        if reindex:
+            self._index_child(item)
+
+    def _index_child(self, edge):
+        if edge.type == "CONTAINS" and "index" in edge.properties:
+            key = (edge.from_id, edge.properties["index"])
+            self._children.setdefault(key, {})[edge.id] = edge
+
+    def _unindex_child(self, edge):
+        if edge.type == "CONTAINS" and "index" in edge.properties:
+            key = (edge.from_id, edge.properties["index"])
+            bucket = self._children.get(key, {})
+            bucket.pop(edge.id, None)
+            if not bucket:
+                self._children.pop(key, None)
+
+    def _record(self, kind, item, *args):
+        if self._journal is not None:
+            self._journal.append((kind, item, *args))
 
     def to_dict(self):
         return {
             "nodes": [n.to_dict() for n in self.nodes.values()],
-            "edges": [e.to_dict() for e in self.edges]
+            "edges": [e.to_dict() for e in self._edges.values()]
         }
 
     def save(self, path):
         with open(path, 'w') as f:
             json.dump(self.to_dict(), f, indent=2)
-        print(f"Graph saved: {len(self.nodes)} nodes, {len(self.edges)} edges -> {path}")
+        print(f"Graph saved: {len(self.nodes)} nodes, {len(self._edges)} edges -> {path}")
 
     @classmethod
     def load(cls, path):
@@ -84,9 +241,7 @@ class Graph:
             data = json.load(f)
         g = cls()
         for nd in data["nodes"]:
-            node = Node(nd["labels"], nd["properties"], nd["id"])
-            g.nodes[node.id] = node
+            g.add_node(Node(nd["labels"], nd["properties"], nd["id"]))
         for ed in data["edges"]:
-            edge = Edge(ed["type"], ed["from"], ed["to"], ed["properties"], ed["id"])
-            g.edges.append(edge)
+            g.add_edge(Edge(ed["type"], ed["from"], ed["to"], ed["properties"], ed["id"]))
         return g
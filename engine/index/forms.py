@@ -0,0 +1,157 @@
+"""
+Normal forms of lexicon terms, after the archive's abstract_text.
+
+Each layer is computed from the one before, and each is coarser:
+
+    blanched   accents and typographic punctuation folded to ASCII, lowercased
+    chopped    anything but letters, digits and whitespace dropped
+    folded     the chopped words in sorted order
+    mashed     the folded form without spaces
+    juiced     the sorted set of the mashed form's characters
+
+Ingest keys Terms by one layer (the lexicon's "normal_form" in the corpus
+config, chopped by default), so "Dude," and "dude" share a Term, and stores
+that layer and the coarser ones as Term properties. Unlike the archive's,
+chopped drops inner punctuation rather than splitting on it ("don't" is
+"dont", not "don t"), so a single word always keys to a single word. Forms
+are computed once per distinct raw text through a Normalizer's memo table,
+not per occurrence. Queries go through the same normalizer (see
+lexicon_normalizer), so "Dude," finds the Term "dude".
+
+FormIndex maps every layer's form back to the Terms that have it, so a
+lookup by any form of any spelling is a dictionary access.
+"""
+
+import re
+import unicodedata
+
+from engine.graph.model import Graph
+
+LAYERS = ("blanched", "chopped", "folded", "mashed", "juiced")
+DEFAULT_LAYER = "chopped"
+
+_PUNCTUATION = re.compile(r"[^0-9a-z\s]+")
+_TYPOGRAPHIC = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "‛": "'",
+    "“": '"', "”": '"', "„": '"',
+    "–": "-", "—": "-", "…": "...",
+})
+
+
+def normal_forms(text: str) -> tuple:
+    """Every layer's form of text, in LAYERS order."""
+    folded = unicodedata.normalize("NFKD", str(text).translate(_TYPOGRAPHIC))
+    blanched = folded.encode("ascii", "ignore").decode().lower().strip()
+    chopped = " ".join(_PUNCTUATION.sub("", blanched).split())
+    words = " ".join(sorted(chopped.split()))
+    mashed = words.replace(" ", "")
+    return blanched, chopped, words, mashed, juice(mashed)
+
+
+def normal_form(text: str, layer: str) -> str:
+    return normal_forms(text)[_position(layer)]
+
+
+def juice(form: str) -> str:
+    return "".join(sorted(set(form)))
+
+
+class Normalizer:
+    """
+    Normal forms of raw texts, memoized per distinct text unless memoize is
+    off (for query texts, which are unbounded). Layer None keys texts by
+    lowercasing only, as terms were keyed before normal forms.
+    """
+
+    def __init__(self, layer: str = DEFAULT_LAYER, memoize: bool = True):
+        self.layer = layer
+        self._position = _position(layer) if layer is not None else None
+        self._memo = {} if memoize else None    # raw text -> normal_forms(raw text)
+
+    def forms(self, text: str) -> tuple:
+        if self._memo is None:
+            return normal_forms(text)
+        forms = self._memo.get(text)
+        if forms is None:
+            forms = self._memo[text] = normal_forms(text)
+        return forms
+
+    def key(self, text: str) -> str:
+        """
+        The text's form at this normalizer's layer; for texts with nothing
+        left at that layer (e.g. "--"), the first nonempty finer form, or
+        the lowercased text.
+        """
+        if self._position is None:
+            return text.lower()
+        forms = self.forms(text)
+        for form in reversed(forms[:self._position + 1]):
+            if form:
+                return form
+        return text.lower()
+
+    def properties(self, text: str) -> dict:
+        """Term properties for the layers coarser than this one, e.g. {"folded": ...}."""
+        if self._position is None:
+            return {}
+        forms = self.forms(text)
+        return {layer: forms[i] for i, layer in enumerate(LAYERS) if i > self._position}
+
+
+def lexicon_normalizer(g: Graph, memoize: bool = False) -> Normalizer:
+    """The normalizer g's Terms were keyed with, per its Lexicon node."""
+    for lexicon in g.get_nodes_by_label("Lexicon"):
+        return Normalizer(lexicon.properties.get("normal_form"), memoize)
+    return Normalizer(None, memoize)
+
+
+class FormIndex:
+    def __init__(self):
+        self._normalizer = Normalizer()
+        self._text_of = {}                          # term id -> text
+        self._terms = {layer: {} for layer in LAYERS}  # layer -> form -> set of term ids
+
+    def lookup(self, text: str, layer: str = DEFAULT_LAYER) -> list:
+        """Texts of the terms whose form at layer matches text's, e.g. "dude," for "Dude"."""
+        form = normal_forms(text)[_position(layer)]
+        return sorted(self._text_of[term_id] for term_id in self._terms[layer].get(form, ()))
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph):
+        self._text_of.clear()
+        for terms in self._terms.values():
+            terms.clear()
+        for term in g.get_nodes_by_label("Term"):
+            self._add(term.id, term.properties.get("text", ""))
+
+    def apply(self, g: Graph, delta: dict):
+        for nd in delta["nodes"]["removed"]:
+            if nd["id"] in self._text_of:
+                self._remove(nd["id"])
+        for nd in delta["nodes"]["added"]:
+            if "Term" in nd["labels"]:
+                self._add(nd["id"], nd["properties"].get("text", ""))
+        for nd in delta["nodes"]["updated"]:
+            if nd["id"] in self._text_of and "text" in nd["properties"]:
+                self._remove(nd["id"])
+                self._add(nd["id"], nd["properties"]["text"] or "")
+
+    def _add(self, term_id, text: str):
+        self._text_of[term_id] = text
+        for layer, form in zip(LAYERS, self._normalizer.forms(text)):
+            self._terms[layer].setdefault(form, set()).add(term_id)
+
+    def _remove(self, term_id):
+        text = self._text_of.pop(term_id)
+        for layer, form in zip(LAYERS, self._normalizer.forms(text)):
+            ids = self._terms[layer][form]
+            ids.discard(term_id)
+            if not ids:
+                del self._terms[layer][form]
+
+
+def _position(layer: str) -> int:
+    if layer not in LAYERS:
+        raise ValueError(f"Unknown normal form {layer!r}; use one of {', '.join(LAYERS)}")
+    return LAYERS.index(layer)
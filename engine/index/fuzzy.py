@@ -0,0 +1,155 @@
+"""
+Fuzzy index over the lexicon's Term nodes, for spelling variants and typos.
+
+Terms are keyed by two of their normal forms (see engine.index.forms):
+mashed, with accents folded and only letters and digits kept, and juiced,
+the sorted set of the mashed form's characters. Every mashed form is
+indexed by its character trigrams (padded with "##" at both ends) and by
+its juiced form. A lookup counts shared trigrams over the query's postings
+only and keeps the forms that could still be within the edit distance (an
+edit changes at most four of a word's trigrams), plus any with the same
+letters; only those are compared with the query by edit distance, so the
+cost follows the size of the neighbourhood rather than of the lexicon. The
+archive's get_closest_match compared every entry.
+
+The default tolerance grows with the length, as the archive's did, but
+stays low enough for the trigram count to rule forms out; a larger
+max_distance falls back to comparing every form of a similar length.
+
+Distances are optimal string alignment: insertions, deletions,
+substitutions and adjacent transpositions each count one.
+"""
+
+from collections import Counter
+
+from engine.graph.model import Graph
+from engine.index.forms import juice, normal_form
+
+
+class FuzzyIndex:
+    def __init__(self):
+        self._text_of = {}   # term id -> text
+        self._forms = {}     # mashed form -> set of term ids
+        self._grams = {}     # trigram -> set of mashed forms
+        self._juiced = {}    # juiced form -> set of mashed forms
+        self._lengths = {}   # length -> set of mashed forms, for wide lookups
+
+    def closest(self, text: str, limit: int = 10, max_distance: int = None) -> list:
+        """
+        [(term text, distance), ...] of the terms nearest to text, closest
+        first. max_distance defaults to threshold() of the mashed text.
+        """
+        form = mash(text)
+        if not form:
+            return []
+        if max_distance is None:
+            max_distance = threshold(form)
+        grams = _trigrams(form)
+        need = len(grams) - 4 * max_distance
+        if need > 0:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._grams.get(gram, ()))
+            candidates = {other for other, count in shared.items()
+                          if count >= need and abs(len(other) - len(form)) <= max_distance}
+        else:
+            candidates = set().union(*(self._lengths.get(length, ()) for length in
+                                       range(len(form) - max_distance, len(form) + max_distance + 1)))
+        candidates.update(self._juiced.get(juice(form), ()))
+
+        matches = []
+        for other in candidates:
+            distance = edit_distance(form, other, max_distance)
+            if distance <= max_distance:
+                matches.extend((distance, self._text_of[term_id]) for term_id in self._forms[other])
+        matches.sort()
+        return [(text, distance) for distance, text in matches[:limit]]
+
+    def variants(self, text: str) -> list:
+        """Texts of the terms with the same mashed form as text, e.g. "dude," for "dude"."""
+        return sorted(self._text_of[term_id] for term_id in self._forms.get(mash(text), ()))
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph):
+        self._text_of.clear()
+        self._forms.clear()
+        self._grams.clear()
+        self._juiced.clear()
+        self._lengths.clear()
+        for term in g.get_nodes_by_label("Term"):
+            self._add(term.id, term.properties.get("text", ""))
+
+    def apply(self, g: Graph, delta: dict):
+        for nd in delta["nodes"]["removed"]:
+            if nd["id"] in self._text_of:
+                self._remove(nd["id"])
+        for nd in delta["nodes"]["added"]:
+            if "Term" in nd["labels"]:
+                self._add(nd["id"], nd["properties"].get("text", ""))
+        for nd in delta["nodes"]["updated"]:
+            if nd["id"] in self._text_of and "text" in nd["properties"]:
+                self._remove(nd["id"])
+                self._add(nd["id"], nd["properties"]["text"] or "")
+
+    def _add(self, term_id, text: str):
+        self._text_of[term_id] = text
+        form = mash(text)
+        if form not in self._forms:
+            self._forms[form] = set()
+            for gram in _trigrams(form):
+                self._grams.setdefault(gram, set()).add(form)
+            self._juiced.setdefault(juice(form), set()).add(form)
+            self._lengths.setdefault(len(form), set()).add(form)
+        self._forms[form].add(term_id)
+
+    def _remove(self, term_id):
+        form = mash(self._text_of.pop(term_id))
+        ids = self._forms[form]
+        ids.discard(term_id)
+        if ids:
+            return
+        del self._forms[form]
+        for gram in _trigrams(form):
+            self._grams[gram].discard(form)
+            if not self._grams[gram]:
+                del self._grams[gram]
+        key = juice(form)
+        self._juiced[key].discard(form)
+        if not self._juiced[key]:
+            del self._juiced[key]
+        self._lengths[len(form)].discard(form)
+
+
+def mash(text: str) -> str:
+    return normal_form(text, "mashed")
+
+
+def threshold(form: str) -> int:
+    """
+    Edit distance tolerated by default for a mashed form: one per four
+    characters, so that its padded trigrams always outnumber four per edit.
+    """
+    return (len(form) + 1) // 4
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance of a and b, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+def _trigrams(form: str) -> set:
+    padded = f"##{form}##"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
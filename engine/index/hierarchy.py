@@ -0,0 +1,231 @@
+"""
+Nested-set (interval) index over the containment hierarchy:
+Corpus -> Volume -> Scene -> Shot -> Paragraph -> Sentence.
+
+A depth-first tour numbers every node on entry (left) and exit (right), so
+a node's descendants are exactly the nodes whose left falls inside its span:
+
+    contains(a, b)          O(1)      left[a] < left[b] < right[a]
+    enclosing(id, label)    O(depth)  e.g. the scene a sentence belongs to
+    descendants(id, label)  O(log n + k), in reading order, via bisect on
+                            the sorted lefts of each label
+
+Numbers are spread GAP apart, so after a curation operation only the
+changed stretch of siblings is renumbered, inside the room its neighbours
+leave; if that room runs out, the whole parent is respaced within its own
+span, and only as a last resort is the index rebuilt.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+from engine.curate.operations import HIERARCHY
+from engine.graph.model import Graph
+
+LEVELS = [level.capitalize() for level in HIERARCHY]
+
+GAP = 16
+
+
+class HierarchyIndex:
+    def __init__(self):
+        self._left = {}     # node id -> entry number
+        self._right = {}    # node id -> exit number
+        self._parent = {}   # node id -> parent node id (absent for roots)
+        self._label = {}    # node id -> hierarchy label
+        self._lefts = {}    # label -> sorted entry numbers of nodes with that label
+        self._at = {}       # entry number -> node id
+
+    # --- queries ---
+
+    def span(self, node_id):
+        """(left, right) of a node, or None if it is not in the hierarchy."""
+        if node_id not in self._left:
+            return None
+        return self._left[node_id], self._right[node_id]
+
+    def contains(self, ancestor_id, node_id) -> bool:
+        """True if node_id lies strictly inside ancestor_id's subtree."""
+        if ancestor_id not in self._left or node_id not in self._left:
+            return False
+        return self._left[ancestor_id] < self._left[node_id] < self._right[ancestor_id]
+
+    def parent(self, node_id):
+        return self._parent.get(node_id)
+
+    def children(self, g: Graph, node_id) -> list:
+        """Ids of a node's hierarchy children, in index order."""
+        # Term occurrences (ordered by 'position') are the bulk of the edges; skip them cheaply
+        edges = [e for e in g.get_edges_from(node_id, "CONTAINS")
+                 if "position" not in e.properties
+                 and e.to_id in g.nodes and _level(g.nodes[e.to_id].labels)]
+        edges.sort(key=lambda e: e.properties.get("index", 0))
+        return [e.to_id for e in edges]
+
+    def enclosing(self, node_id, label: str):
+        """The nearest node with label at or above node_id, or None."""
+        while node_id is not None and node_id in self._label:
+            if self._label[node_id] == label:
+                return node_id
+            node_id = self._parent.get(node_id)
+        return None
+
+    def descendants(self, node_id, label: str) -> list:
+        """Ids of the nodes with label inside node_id's subtree, in reading order."""
+        if node_id not in self._left:
+            return []
+        lefts = self._lefts.get(label, [])
+        lo = bisect_right(lefts, self._left[node_id])
+        hi = bisect_left(lefts, self._right[node_id])
+        return [self._at[left] for left in lefts[lo:hi]]
+
+    def in_order(self, label: str, after=None, before=None) -> list:
+        """
+        Ids of all nodes with label in reading order, or only those strictly
+        between the nodes after and before (either may be None for no bound).
+        """
+        lefts = self._lefts.get(label, [])
+        lo = bisect_right(lefts, self._left[after]) if after is not None else 0
+        hi = bisect_left(lefts, self._left[before]) if before is not None else len(lefts)
+        return [self._at[left] for left in lefts[lo:hi]]
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph):
+        self.__init__()
+        roots = g.get_nodes_by_label(LEVELS[0]) or g.get_nodes_by_label(LEVELS[1])
+        events = []
+        for root in roots:
+            self._tour(g, root.id, None, events)
+        self._assign(events, 0, (len(events) + 1) * GAP, sort=False)
+        for lefts in self._lefts.values():
+            lefts.sort()
+
+    def apply(self, g: Graph, delta: dict):
+        """Bring the index up to date with a committed delta."""
+        labels = {nd["id"]: nd["labels"] for nd in delta["nodes"]["removed"]}
+        for node_id in labels:
+            self._forget(node_id)
+
+        # Parents whose list of children changed; ancestors first
+        changed = set()
+        for ed in delta["edges"]["added"] + delta["edges"]["removed"]:
+            if ed["type"] != "CONTAINS" or ed["from"] not in self._left:
+                continue
+            target = g.nodes.get(ed["to"])
+            if _level(target.labels if target else labels.get(ed["to"], [])):
+                changed.add(ed["from"])
+
+        done = set()
+        for parent_id in sorted(changed, key=self._left.get):
+            if parent_id in done or parent_id not in self._left:
+                continue
+            if not self._respace(g, parent_id, done):
+                self.rebuild(g)
+                return
+
+    def _respace(self, g: Graph, parent_id, done: set) -> bool:
+        """
+        Renumber the children of parent_id that are new to it, in the gaps
+        between the children it kept. False if even a full respace of
+        parent_id's span has no room.
+        """
+        children = self.children(g, parent_id)
+        runs = []           # (lo, hi, [new child ids]) gaps to fill
+        lo = self._left[parent_id]
+        pending = []
+        for child_id in children:
+            kept = self._parent.get(child_id) == parent_id and child_id in self._left
+            if kept and self._left[child_id] > lo:
+                if pending:
+                    runs.append((lo, self._left[child_id], pending))
+                    pending = []
+                lo = self._right[child_id]
+            else:
+                pending.append(child_id)
+        if pending:
+            runs.append((lo, self._right[parent_id], pending))
+
+        tours = []
+        for lo, hi, run in runs:
+            events = []
+            for child_id in run:
+                self._tour(g, child_id, parent_id, events)
+            tours.append((lo, hi, events))
+        if all(_fits(events, lo, hi) for lo, hi, events in tours):
+            for lo, hi, events in tours:
+                self._assign(events, lo, hi)
+                done.update(node_id for node_id, _, _ in events)
+            return True
+
+        # No room between the kept children: respace the whole parent
+        events = []
+        for child_id in children:
+            self._tour(g, child_id, parent_id, events)
+        lo, hi = self._left[parent_id], self._right[parent_id]
+        if not _fits(events, lo, hi):
+            return False
+        self._assign(events, lo, hi)
+        done.update(node_id for node_id, _, _ in events)
+        return True
+
+    def _tour(self, g: Graph, node_id, parent_id, events: list):
+        """
+        Append the events of a depth-first tour: (id, parent id, label) on
+        entry and (id, parent id, None) on exit.
+        """
+        events.append((node_id, parent_id, _level(g.nodes[node_id].labels)))
+        for child_id in self.children(g, node_id):
+            self._tour(g, child_id, node_id, events)
+        events.append((node_id, parent_id, None))
+
+    def _assign(self, events: list, lo: int, hi: int, sort=True):
+        """Number the events evenly strictly between lo and hi."""
+        step = (hi - lo) // (len(events) + 1)
+        position = lo
+        for node_id, parent_id, label in events:
+            position += step
+            if label is None:
+                self._right[node_id] = position
+                continue
+            self._unplace(node_id)
+            self._label[node_id] = label
+            self._left[node_id] = position
+            self._at[position] = node_id
+            if parent_id is None:
+                self._parent.pop(node_id, None)
+            else:
+                self._parent[node_id] = parent_id
+            lefts = self._lefts.setdefault(label, [])
+            if sort:
+                insort(lefts, position)
+            else:
+                lefts.append(position)
+
+    def _forget(self, node_id):
+        if node_id in self._left:
+            self._unplace(node_id)
+            del self._left[node_id]
+            self._right.pop(node_id, None)
+            self._parent.pop(node_id, None)
+            del self._label[node_id]
+
+    def _unplace(self, node_id):
+        """Drop a node's entry number from the per-label order."""
+        left = self._left.get(node_id)
+        if left is None:
+            return
+        lefts = self._lefts[self._label[node_id]]
+        i = bisect_left(lefts, left)
+        if i < len(lefts) and lefts[i] == left:
+            del lefts[i]
+        if self._at.get(left) == node_id:
+            del self._at[left]
+
+
+def _level(labels) -> str:
+    """The hierarchy label among labels, or None (terms, lexicon)."""
+    return next((label for label in labels if label in LEVELS), None)
+
+
+def _fits(events: list, lo: int, hi: int) -> bool:
+    return (hi - lo) // (len(events) + 1) >= 1
@@ -0,0 +1,111 @@
+"""
+Reading-order index: for each hierarchy level, every node's global ordinal.
+
+PRECEDES edges chain the nodes of a level one hop at a time (and only
+within a parent below scene level); this materializes the whole reading
+order of each level as an array plus a node -> ordinal map, so "the next
+five sentences", "everything between A and B" or a timeline slice are list
+slices instead of chain walks.
+
+The order is taken from the hierarchy index, which numbers nodes in the same
+document order the PRECEDES chains follow. After a merge or split only the
+window of the level that changed is spliced; ordinals after it shift, which
+costs O(length of the tail) dict updates but no graph access.
+"""
+
+from engine.graph.model import Graph
+from engine.index.hierarchy import HierarchyIndex, LEVELS
+
+
+class OrderIndex:
+    def __init__(self, hierarchy: HierarchyIndex):
+        self._hierarchy = hierarchy
+        self._sequence = {}  # label -> [node id] in reading order
+        self._ordinal = {}   # node id -> position in its level's sequence
+        self._label = {}     # node id -> label of its level
+
+    # --- queries ---
+
+    def ordinal(self, node_id):
+        """0-based position of node_id within its level, or None."""
+        return self._ordinal.get(node_id)
+
+    def level_size(self, label: str) -> int:
+        return len(self._sequence.get(label, []))
+
+    def slice(self, label: str, start: int, stop: int) -> list:
+        return self._sequence.get(label, [])[start:stop]
+
+    def around(self, node_id, before: int, after: int) -> tuple:
+        """(up to before ids preceding node_id, up to after ids following it)."""
+        i = self._ordinal[node_id]
+        sequence = self._sequence[self._label[node_id]]
+        return sequence[max(i - before, 0):i], sequence[i + 1:i + 1 + after]
+
+    def between(self, first_id, last_id) -> list:
+        """Ids from first_id to last_id inclusive, in reading order; same level only."""
+        label = self._label[first_id]
+        if self._label[last_id] != label:
+            raise ValueError("Nodes are on different levels")
+        i, j = sorted((self._ordinal[first_id], self._ordinal[last_id]))
+        return self._sequence[label][i:j + 1]
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph):
+        self._sequence.clear()
+        self._ordinal.clear()
+        self._label.clear()
+        for label in LEVELS:
+            self._sequence[label] = self._hierarchy.in_order(label)
+            self._renumber(label, 0)
+
+    def apply(self, g: Graph, delta: dict):
+        """Splice each level whose membership changed; run after the hierarchy's apply."""
+        removed, added = {}, {}
+        for nd in delta["nodes"]["removed"]:
+            if nd["id"] in self._ordinal:
+                removed.setdefault(self._label[nd["id"]], []).append(nd["id"])
+        for nd in delta["nodes"]["added"]:
+            label = next((label for label in nd["labels"] if label in LEVELS), None)
+            if label:
+                added.setdefault(label, []).append(nd["id"])
+        for label in set(removed) | set(added):
+            self._splice(label, removed.get(label, []), added.get(label, []))
+
+    def _splice(self, label: str, removed: list, added: list):
+        sequence = self._sequence[label]
+        if not removed:
+            self._sequence[label] = self._hierarchy.in_order(label)
+            self._renumber(label, 0)
+            return
+        ordinals = [self._ordinal[node_id] for node_id in removed]
+        lo, hi = min(ordinals), max(ordinals) + 1
+        before = sequence[lo - 1] if lo > 0 else None
+        after = sequence[hi] if hi < len(sequence) else None
+        window = self._hierarchy.in_order(label, before, after)
+        # The new nodes must all land in the window, and nothing from outside
+        # it may have moved in; otherwise fall back to a full pass
+        old = set(sequence[lo:hi])
+        if not set(added) <= set(window) or not all(n in old or n in added for n in window):
+            window = None
+        self._forget(removed)
+        if window is None:
+            self._sequence[label] = self._hierarchy.in_order(label)
+            self._renumber(label, 0)
+            return
+        sequence[lo:hi] = window
+        self._renumber(label, lo, None if len(window) != hi - lo else lo + len(window))
+
+    def _forget(self, node_ids: list):
+        for node_id in node_ids:
+            self._ordinal.pop(node_id, None)
+            self._label.pop(node_id, None)
+
+    def _renumber(self, label: str, start: int, stop: int = None):
+        sequence = self._sequence[label]
+        ordinal, labels = self._ordinal, self._label
+        for i in range(start, len(sequence) if stop is None else stop):
+            node_id = sequence[i]
+            ordinal[node_id] = i
+            labels[node_id] = label
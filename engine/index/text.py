@@ -0,0 +1,277 @@
+"""
+Inverted full-text index over the lexicon.
+
+For every term, the sentences it occurs in and its positions there, taken
+from the Sentence -[CONTAINS {position}]-> Term edges:
+
+    postings: term text -> {sentence id: [position, ...]}
+
+Built once at ingest and saved next to graph.json (see run.py); the API
+loads it, applies the curation on top as a delta, and keeps it current from
+each published delta, re-reading only the sentences a change touched.
+
+Queries (search) combine words and "quoted phrases" with AND, OR, NOT and
+parentheses; adjacent terms are ANDed. A query term matches the lexicon
+term it normalizes to, the way ingest keyed the graph's Terms (see
+engine.index.forms), unless search is given an expand function
+mapping a word to the terms it should match (e.g. its fuzzy matches).
+"""
+
+import hashlib
+import json
+import re
+
+from engine.graph.model import Graph
+from engine.index.forms import Normalizer, lexicon_normalizer
+
+_TOKEN = re.compile(r'"[^"]*"|\(|\)|[^\s()"]+')
+_OPERATORS = {"AND", "OR", "NOT"}
+
+
+class TextIndex:
+    def __init__(self):
+        self._postings = {}  # term text -> {sentence id: [positions]}
+        self._terms = {}     # sentence id -> set of term texts it contains
+        self._normalizer = Normalizer(None, memoize=False)  # query word -> term text
+
+    # --- queries ---
+
+    def normalize(self, word: str) -> str:
+        """The lexicon term text a query word stands for, e.g. "dude" for "Dude,"."""
+        return self._normalizer.key(word)
+
+    def lookup(self, term: str) -> dict:
+        """{sentence id: [positions]} for one term; treat as read-only."""
+        return self._postings.get(self.normalize(term), {})
+
+    def postings(self) -> dict:
+        """{term text: {sentence id: [positions]}} for every term; treat as read-only."""
+        return self._postings
+
+    def sentences(self):
+        """Ids of the sentences with any indexed term, as a live read-only view."""
+        return self._terms.keys()
+
+    def sentence_counts(self, sentence_id) -> dict:
+        """{term text: occurrences} in one sentence."""
+        return {text: len(self._postings[text][sentence_id])
+                for text in self._terms.get(sentence_id, ())}
+
+    def occurrences(self, term: str) -> list:
+        """Every (sentence id, position) of a term, in no particular order."""
+        return [(sentence_id, position)
+                for sentence_id, positions in self.lookup(term).items()
+                for position in positions]
+
+    def phrase(self, words: list) -> dict:
+        """{sentence id: [positions of every word of each match]} for consecutive words."""
+        postings = [self.lookup(word) for word in words]
+        if not postings or not all(postings):
+            return {}
+        candidates = set.intersection(*(set(p) for p in postings))
+        matches = {}
+        for sentence_id in candidates:
+            positions = [set(p[sentence_id]) for p in postings]
+            hit = set()
+            for start in positions[0]:
+                if all(start + i in positions[i] for i in range(1, len(words))):
+                    hit.update(range(start, start + len(words)))
+            if hit:
+                matches[sentence_id] = sorted(hit)
+        return matches
+
+    def search(self, query: str, expand=None) -> dict:
+        """
+        {sentence id: [matched positions]} for a boolean query.
+        Raises ValueError on a malformed query.
+        """
+        tokens = _TOKEN.findall(query)
+        if not tokens:
+            raise ValueError("Empty query")
+        parser = _Parser(self, tokens, expand)
+        result = parser.parse_or()
+        if parser.pos != len(tokens):
+            raise ValueError(f"Unexpected {tokens[parser.pos]!r}")
+        return {s: sorted(p) for s, p in result.items()}
+
+    # --- maintenance ---
+
+    def rebuild(self, g: Graph):
+        self._postings.clear()
+        self._terms.clear()
+        self._normalizer = lexicon_normalizer(g)
+        for term in g.get_nodes_by_label("Term"):
+            for edge in g.get_edges_to(term.id, "CONTAINS"):
+                if "position" in edge.properties:
+                    self._add(edge.from_id, term.properties["text"], edge.properties["position"])
+        for postings in self._postings.values():
+            for positions in postings.values():
+                positions.sort()
+
+    def apply(self, g: Graph, delta: dict):
+        """Re-read the sentences whose term occurrences changed."""
+        for sentence_id in touched_sentences(g, delta, self._terms):
+            self._reindex(g, sentence_id)
+
+    def _reindex(self, g: Graph, sentence_id):
+        for text in self._terms.pop(sentence_id, ()):
+            postings = self._postings[text]
+            del postings[sentence_id]
+            if not postings:
+                del self._postings[text]
+        if sentence_id not in g.nodes:
+            return
+        edges = sorted((e for e in g.get_edges_from(sentence_id, "CONTAINS")
+                        if "position" in e.properties),
+                       key=lambda e: e.properties["position"])
+        for edge in edges:
+            self._add(sentence_id, g.nodes[edge.to_id].properties["text"], edge.properties["position"])
+
+    def _add(self, sentence_id, text, position):
+        self._postings.setdefault(text, {}).setdefault(sentence_id, []).append(position)
+        self._terms.setdefault(sentence_id, set()).add(text)
+
+    # --- persistence ---
+
+    def save(self, path, g: Graph = None):
+        """Write the postings as JSON, stamped with the graph they index if given."""
+        data = {"postings": self._postings}
+        if g is not None:
+            data["graph"] = _stamp(g)
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        print(f"Text index saved: {len(self._postings)} terms -> {path}")
+
+    @classmethod
+    def load(cls, path, g: Graph = None):
+        """
+        Read postings saved by save(); None if they were stamped with a graph
+        other than g, e.g. one from an earlier ingest of the same script.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        stamp = data.get("graph")
+        if g is not None and stamp and stamp != _stamp(g):
+            return None
+        index = cls()
+        if g is not None:
+            index._normalizer = lexicon_normalizer(g)
+        index._postings = data["postings"]
+        for text, postings in index._postings.items():
+            for sentence_id in postings:
+                index._terms.setdefault(sentence_id, set()).add(text)
+        return index
+
+
+def _stamp(g: Graph) -> dict:
+    """
+    What identifies a graph: its size and a digest of its node and edge ids,
+    which ingest draws at random, so two ingests never share one.
+    """
+    digest = hashlib.sha1()
+    for ids in (g.nodes, (edge.id for edge in g.edges)):
+        for item_id in sorted(ids):
+            digest.update(f"{item_id}\n".encode())
+    return {"nodes": len(g.nodes), "edges": len(g.edges), "ids": digest.hexdigest()}
+
+
+def touched_sentences(g: Graph, delta: dict, known=()) -> set:
+    """
+    Ids of the sentences whose term occurrences a delta changed, including
+    removed ones among known (ids that had occurrences before).
+    """
+    sentences = set()
+    for ed in delta["edges"]["added"] + delta["edges"]["removed"]:
+        if ed["type"] == "CONTAINS" and ed["to"] in g.nodes and "Term" in g.nodes[ed["to"]].labels:
+            sentences.add(ed["from"])
+    for ed in delta["edges"]["updated"]:
+        edge = g.get_edge(ed["id"])
+        if edge is not None and "position" in ed["properties"]:
+            sentences.add(edge.from_id)
+    for nd in delta["nodes"]["removed"]:
+        if nd["id"] in known:
+            sentences.add(nd["id"])
+    return sentences
+
+
+class _Parser:
+    """
+    Recursive descent over query tokens, each level returning
+    {sentence id: set of matched positions}:
+
+        or   := and ("OR" and)*
+        and  := not (["AND"] not)*
+        not  := "NOT" not | atom
+        atom := "(" or ")" | "phrase" | word
+    """
+
+    def __init__(self, index: TextIndex, tokens: list, expand=None):
+        self.index = index
+        self.tokens = tokens
+        self.expand = expand
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse_or(self) -> dict:
+        result = self.parse_and()
+        while self.peek() == "OR":
+            self.take()
+            other = self.parse_and()
+            for sentence_id, positions in other.items():
+                result.setdefault(sentence_id, set()).update(positions)
+        return result
+
+    def parse_and(self) -> dict:
+        result = self.parse_not()
+        while self.peek() is not None and self.peek() not in ("OR", ")"):
+            if self.peek() == "AND":
+                self.take()
+            if self.peek() == "NOT":
+                # "a NOT b": subtract b rather than intersect with its complement
+                self.take()
+                excluded = self.parse_not()
+                result = {s: p for s, p in result.items() if s not in excluded}
+                continue
+            other = self.parse_not()
+            result = {s: p | other[s] for s, p in result.items() if s in other}
+        return result
+
+    def parse_not(self) -> dict:
+        if self.peek() == "NOT":
+            self.take()
+            excluded = self.parse_not()
+            return {s: set() for s in self.index.sentences() if s not in excluded}
+        return self.parse_atom()
+
+    def parse_atom(self) -> dict:
+        token = self.take()
+        if token is None:
+            raise ValueError("Query ends unexpectedly")
+        if token == "(":
+            result = self.parse_or()
+            if self.take() != ")":
+                raise ValueError("Missing )")
+            return result
+        if token == ")" or token in _OPERATORS:
+            raise ValueError(f"Unexpected {token!r}")
+        if token.startswith('"'):
+            words = token.strip('"').lower().split()
+            if not words:
+                raise ValueError("Empty phrase")
+            matches = self.index.phrase(words)
+        elif self.expand is not None:
+            result = {}
+            for term in self.expand(token):
+                for sentence_id, positions in self.index.lookup(term).items():
+                    result.setdefault(sentence_id, set()).update(positions)
+            return result
+        else:
+            matches = self.index.lookup(token)
+        return {s: set(p) for s, p in matches.items()}
@@ -3,6 +3,16 @@ Ingest pipeline: takes parsed screenplay structure and builds the property graph
 
 Hierarchy: Corpus -> Scene -> Shot -> Paragraph -> Sentence
 Lexicon:   Sentence -[CONTAINS]-> Term  (with position, pos, raw form as edge properties)
+
+Terms are keyed by a normal form of the word (the config's
+lexicon.normal_form, see engine.index.forms), so punctuation, case and
+accent variants share a Term. Statistics are gathered per Term as the
+occurrence edges are created and stored on it: frequency, scene_frequency
+(number of scenes it occurs in), first and last occurrence ({scene index,
+sentence id}), pos (occurrences per part-of-speech tag), and an
+'importance' weight from the frequency (see engine.analysis.importance).
+Scene indexes are the parsed ones; the sentence id is what places an
+occurrence once curation has renumbered scenes.
 """
 
 import sys
@@ -10,7 +20,9 @@ from pathlib import Path
 from textblob import TextBlob
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from engine.analysis.importance import term_importance
 from engine.graph.model import Graph
+from engine.index.forms import DEFAULT_LAYER, Normalizer
 
 
 def ingest(parsed, config):
@@ -35,16 +47,31 @@ def ingest(parsed, config):
     })
     g.create_edge('CONTAINS', corpus.id, volume.id)
 
-    # Term registry: normalized text -> Node
+    # Term registry: normalized text -> Node, and statistics per term
     terms = {}
+    stats = {}
+    normalizer = Normalizer(config.get('lexicon', {}).get('normal_form', DEFAULT_LAYER))
 
     def get_or_create_term(word):
-        key = word.lower()
+        key = normalizer.key(word)
         if key not in terms:
-            terms[key] = g.create_node(['Term'], {'text': key})
+            terms[key] = g.create_node(['Term'], dict(normalizer.properties(word), text=key))
         return terms[key]
 
-    def ingest_paragraph(para_data, parent_id, prev_para_node):
+    def count_occurrence(term, pos, scene_index, sentence_id):
+        # Occurrences arrive in reading order, so the first one seen is the first
+        location = {'scene': scene_index, 'sentence': sentence_id}
+        term_stats = stats.get(term.id)
+        if term_stats is None:
+            term_stats = stats[term.id] = {'frequency': 0, 'scene_frequency': 0,
+                                           'first': location, 'last': None, 'pos': {}}
+        term_stats['frequency'] += 1
+        if term_stats['last'] is None or term_stats['last']['scene'] != scene_index:
+            term_stats['scene_frequency'] += 1
+        term_stats['last'] = location
+        term_stats['pos'][pos] = term_stats['pos'].get(pos, 0) + 1
+
+    def ingest_paragraph(para_data, parent_id, prev_para_node, scene_index):
         props = {
             'type': para_data['type'],
             'index': para_data['index'],
@@ -77,6 +104,7 @@ def ingest(parsed, config):
 
             for pos_idx, (word, pos) in enumerate(TextBlob(sent_text).tags, start=1):
                 term = get_or_create_term(word)
+                count_occurrence(term, pos, scene_index, sent.id)
                 g.create_edge('CONTAINS', sent.id, term.id, {
                     'position': pos_idx,
                     'pos': pos,
@@ -111,14 +139,23 @@ def ingest(parsed, config):
 
             prev_para_node = None
             for para_data in shot_data['paragraphs']:
-                prev_para_node = ingest_paragraph(para_data, shot.id, prev_para_node)
+                prev_para_node = ingest_paragraph(para_data, shot.id, prev_para_node,
+                                                  scene_data['index'])
 
     # Lexicon node as a named container for all terms
     lexicon = g.create_node(['Lexicon'], {
         'name': config['name'],
-        'term_count': len(terms)
+        'term_count': len(terms),
+        'token_count': sum(term_stats['frequency'] for term_stats in stats.values()),
+        'normal_form': normalizer.layer
     })
     for term_node in terms.values():
         g.create_edge('CONTAINS', lexicon.id, term_node.id)
 
+    importance = term_importance([stats[term_node.id]['frequency'] for term_node in terms.values()])
+    for term_node, value in zip(terms.values(), importance):
+        for key, stat in stats[term_node.id].items():
+            g.set_property(term_node, key, stat)
+        g.set_property(term_node, 'importance', round(float(value), 6))
+
     return g
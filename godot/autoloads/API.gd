@@ -5,6 +5,7 @@
 extends Node
 
 const BASE_URL = "http://localhost:8000"
+const LOADING_RETRY_SECONDS = 1.0
 
 signal request_completed(endpoint: String, data: Variant)
 signal request_failed(endpoint: String, error: String)
@@ -18,6 +19,12 @@ func get_scenes() -> void:
 func get_graph() -> void:
 	_http_get("/graph")
 
+## A node with its descendants `depth` levels down, nested under "children".
+func get_subtree(node_id: String, depth: int, include_terms: bool = false) -> void:
+	_http_get("/nodes/%s/subtree?depth=%d&include_terms=%s" % [
+		node_id, depth, "true" if include_terms else "false"
+	])
+
 func get_operations() -> void:
 	_http_get("/curate/operations")
 
@@ -45,6 +52,16 @@ func rename_scene(index: int, heading: String) -> void:
 		"heading": heading
 	})
 
+## Apply several operations in one atomic request. Each entry is a
+## Dictionary with an "op" key ("merge", "split" or "rename") plus the same
+## fields as the single-operation endpoints.
+func batch(operations: Array) -> void:
+	_http_post("/curate/batch", {"operations": operations})
+
+## Compute the diff a batch would produce without applying or recording it.
+func preview_batch(operations: Array) -> void:
+	_http_post("/curate/batch?dry_run=true", {"operations": operations})
+
 func save_curated() -> void:
 	_http_post("/curate/save", {})
 
@@ -58,7 +75,7 @@ func _http_get(endpoint: String) -> void:
 	var http := HTTPRequest.new()
 	add_child(http)
 	http.request_completed.connect(
-		_on_completed.bind(endpoint, http)
+		_on_get_completed.bind(endpoint, http)
 	)
 	var err := http.request(BASE_URL + endpoint)
 	if err != OK:
@@ -84,6 +101,17 @@ func _http_post(endpoint: String, body: Dictionary) -> void:
 		http.queue_free()
 
 
+## GETs answered 503 are retried: the engine is still loading the graph.
+func _on_get_completed(result: int, code: int, headers: PackedStringArray,
+					   body: PackedByteArray, endpoint: String, http: HTTPRequest) -> void:
+	if result == HTTPRequest.RESULT_SUCCESS and code == 503:
+		http.queue_free()
+		await get_tree().create_timer(LOADING_RETRY_SECONDS).timeout
+		_http_get(endpoint)
+		return
+	_on_completed(result, code, headers, body, endpoint, http)
+
+
 func _on_completed(result: int, code: int, _headers: PackedStringArray,
 				   body: PackedByteArray, endpoint: String, http: HTTPRequest) -> void:
 	http.queue_free()
@@ -7,12 +7,16 @@ extends Node
 
 signal scenes_loaded(scenes: Array)
 signal scene_selected(scene: Dictionary)
+signal scene_detail_loaded(detail: Dictionary)
 signal graph_changed()
+signal preview_ready(diff: Dictionary)
 signal error_occurred(message: String)
 
 var scenes: Array = []
 var selected_scene: Dictionary = {}
+var selected_detail: Dictionary = {}
 var is_loading: bool = false
+var graph_version: int = -1
 
 
 func _ready() -> void:
@@ -28,7 +32,10 @@ func load_scenes() -> void:
 
 func select_scene(scene: Dictionary) -> void:
 	selected_scene = scene
+	selected_detail = {}
 	scene_selected.emit(scene)
+	# Shots, paragraphs and sentences of the scene in one request
+	API.get_subtree(scene["id"], 3)
 
 
 func merge_scenes(indices: Array, heading: String) -> void:
@@ -44,6 +51,14 @@ func split_scene(index: int, at_child_index: int,
 	API.split_scene(index, at_child_index, heading_before, heading_after)
 
 
+func batch(operations: Array) -> void:
+	API.batch(operations)
+
+
+func preview_batch(operations: Array) -> void:
+	API.preview_batch(operations)
+
+
 func save() -> void:
 	API.save_curated()
 
@@ -52,21 +67,86 @@ func save() -> void:
 
 func _on_api_response(endpoint: String, data: Variant) -> void:
 	is_loading = false
+	if endpoint.begins_with("/nodes/"):
+		# Scene detail; ignore it if the selection has moved on meanwhile
+		if data["id"] == selected_scene.get("id"):
+			selected_detail = data
+			scene_detail_loaded.emit(data)
+		return
 	match endpoint:
 		"/scenes":
 			scenes = data
 			scenes_loaded.emit(scenes)
-		"/curate/merge", "/curate/rename", "/curate/split":
-			# Structural change — reload scene list
-			load_scenes()
+		"/curate/merge", "/curate/rename", "/curate/split", "/curate/batch":
+			# Structural change — patch the scene list from the returned delta
+			var contents_changed := _apply_delta(data["delta"])
+			graph_version = data["version"]
+			scenes_loaded.emit(scenes)
 			graph_changed.emit()
+			# Paragraph, speaker and word counts are not in the delta; refetch them
+			if contents_changed:
+				load_scenes()
+		"/curate/batch?dry_run=true":
+			preview_ready.emit(data["delta"])
 		"/curate/save":
 			print("Graph saved.")
 		"/curate/reload":
+			graph_version = data["version"]
 			load_scenes()
 			graph_changed.emit()
 
 
+# Patch the scene summaries in place: O(size of the change). Returns true
+# if the delta changed anything but scene indexes and headings, in which
+# case the other summary fields are stale until the next load_scenes().
+func _apply_delta(delta: Dictionary) -> bool:
+	# Only a pure rename or renumbering leaves every scene's contents alone
+	var contents_changed := not (delta["nodes"]["added"].is_empty()
+			and delta["nodes"]["removed"].is_empty()
+			and delta["edges"]["added"].is_empty()
+			and delta["edges"]["removed"].is_empty()
+			and delta["edges"]["updated"].is_empty())
+	var by_id := {}
+	for scene in scenes:
+		by_id[scene["id"]] = scene
+
+	for node in delta["nodes"]["removed"]:
+		by_id.erase(node["id"])
+	for node in delta["nodes"]["added"]:
+		if "Scene" in node["labels"]:
+			by_id[node["id"]] = {
+				"id": node["id"],
+				"index": node["properties"].get("index"),
+				"heading": node["properties"].get("heading"),
+				"shot_count": 0,
+				"paragraph_count": 0,
+				"speakers": [],
+				"word_count": 0,
+			}
+	for node in delta["nodes"]["updated"]:
+		if not by_id.has(node["id"]):
+			contents_changed = true
+			continue
+		var scene: Dictionary = by_id[node["id"]]
+		for key in node["properties"]:
+			if key in ["index", "heading"]:
+				scene[key] = node["properties"][key]
+			else:
+				contents_changed = true
+
+	# Shot counts follow the scene's CONTAINS edges
+	for edge in delta["edges"]["added"]:
+		if edge["type"] == "CONTAINS" and by_id.has(edge["from"]):
+			by_id[edge["from"]]["shot_count"] += 1
+	for edge in delta["edges"]["removed"]:
+		if edge["type"] == "CONTAINS" and by_id.has(edge["from"]):
+			by_id[edge["from"]]["shot_count"] -= 1
+
+	scenes = by_id.values()
+	scenes.sort_custom(func(a, b): return a["index"] < b["index"])
+	return contents_changed
+
+
 func _on_api_error(endpoint: String, error: String) -> void:
 	is_loading = false
 	var msg := "Error on %s: %s" % [endpoint, error]
@@ -12,6 +12,7 @@ extends Control
 func _ready() -> void:
 	AppState.scenes_loaded.connect(_on_scenes_loaded)
 	AppState.scene_selected.connect(_on_scene_selected)
+	AppState.scene_detail_loaded.connect(_on_scene_detail_loaded)
 	AppState.error_occurred.connect(_on_error)
 	status_label.text = "Loading..."
 
@@ -28,6 +29,17 @@ func _on_scene_selected(scene: Dictionary) -> void:
 	]
 
 
+func _on_scene_detail_loaded(detail: Dictionary) -> void:
+	var lines := PackedStringArray([detail_label.text])
+	for shot in detail.get("children", []):
+		var props: Dictionary = shot["properties"]
+		var paragraphs: Array = shot.get("children", [])
+		lines.append("  %d. %s (%d paragraphs)" % [
+			props.get("index", 0), props.get("heading", ""), paragraphs.size()
+		])
+	detail_label.text = "\n".join(lines)
+
+
 func _on_error(message: String) -> void:
 	status_label.text = "Error: " + message
 
@@ -9,6 +9,7 @@ Reads:  model/config/hierarchy.json
 
 Writes: model/data/parsed.json   (intermediate parse output)
         model/data/graph.json    (property graph)
+        model/data/text_index.json (term postings for search)
 """
 
 import json
@@ -20,6 +21,7 @@ sys.path.insert(0, str(root))
 
 from engine.parse.screenplay import parse_screenplay
 from engine.ingest.ingest import ingest
+from engine.index.text import TextIndex
 
 
 def main():
@@ -45,6 +47,11 @@ def main():
     graph_output = output_dir / 'graph.json'
     graph.save(str(graph_output))
 
+    # Postings are read straight off the Sentence -> Term edges just built
+    text_index = TextIndex()
+    text_index.rebuild(graph)
+    text_index.save(str(output_dir / 'text_index.json'), graph)
+
 
 if __name__ == '__main__':
     main()
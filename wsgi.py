@@ -3,6 +3,10 @@ WSGI/ASGI entry point for production deployment (gunicorn + uvicorn workers).
 
 Usage:
     gunicorn wsgi:app -w 4 -k uvicorn.workers.UvicornWorker
+
+Each worker holds its own copy of the working graph. Workers stay consistent
+through model/config/curation.json, which acts as a file-locked shared
+operation log (see engine/api/state.py).
 """
 
 from engine.api.app import app